@@ -22,6 +22,7 @@ import os
 import sys
 import threading
 import socket
+import time
 import xbmc
 import xbmcaddon
 import xbmcgui
@@ -30,14 +31,21 @@ _addon_ = xbmcaddon.Addon()
 _addon_path_ = _addon_.getAddonInfo('path')
 _addon_name_ = _addon_.getAddonInfo('name')
 _addon_version_ = _addon_.getAddonInfo('version')
+_addon_profile_path_ = xbmc.translatePath(_addon_.getAddonInfo('profile'))
 _settings_ = xbmcaddon.Addon(id='script.myth.pvr.schedules')  # http://kodi.wiki/view/Xbmcaddon_module
+_marked_program_prefix_ = '* '  # Programs list label prefix of marked programs.
 lib_path = os.path.join(_addon_path_, 'lib')
 sys.path.append(lib_path)
 import pyxbmct.addonwindow as pyxbmct
 import lib.myth_services_api as myth_api
 import lib.myth_client as myth_client
+import lib.event_loop as event_loop
 debug_mode = False
 block_shutdown = False
+pipelined_load = False
+incremental_refresh = False
+load_while_connecting = False
+startup_snapshot = False
 
 class KodiGUI(pyxbmct.AddonFullWindow):
     def __init__(self, title=_addon_name_ + ' ' + _addon_version_):
@@ -62,6 +70,8 @@ class KodiGUI(pyxbmct.AddonFullWindow):
         self.__show_update_results = False           # Some recording option changes need the programs list refreshed.
         self.__schedule_delete = False               # Set to cause full UI refresh when client detects update.
         self.__expect_update = False                 # If an unexpected rule change from another client, notify.
+        self.__marked_programs = []                  # Programs list items marked to disable or enable together.
+        self.__load_lock = threading.RLock()         # One load or refresh of the schedules & programs at a time.
 
     def set_info_controls(self):
         """ Display passive controls."""
@@ -128,6 +138,9 @@ class KodiGUI(pyxbmct.AddonFullWindow):
         # Connect remote back button / Backspace to return to main screen from recording settings.
         self.connectEventList([pyxbmct.ACTION_NAV_BACK], self.action_back)
 
+        # Connect context menu to mark programs, to disable or enable together.
+        self.connectEventList([pyxbmct.ACTION_CONTEXT_MENU], self.mark_program)
+
         # Button - Debug
         # self.ButtonDebug = pyxbmct.Button('Debug')
         # self.placeControl(self.ButtonDebug, 25, 5, rowspan=3)
@@ -458,6 +471,10 @@ class KodiGUI(pyxbmct.AddonFullWindow):
                         if debug_mode:
                             debug_log('focus_update: ListSchedules')
                         self.note_selected_schedule()
+                        # Load the focused recording rule and its neighbours ready for editing.
+                        SchedulePrefetcher.prefetch([list_schedules_item_idx + offset for offset in (0, 1, -1, 2, -2)
+                                                     if 0 <= list_schedules_item_idx + offset
+                                                     < self.ListSchedules.size()])
 
             elif self.getFocus() == self.ListPrograms:
                 if self.pvr_connected:
@@ -508,17 +525,70 @@ class KodiGUI(pyxbmct.AddonFullWindow):
         self.StatusLabel.addLabel(_addon_.getLocalizedString(32026))     # 'Connecting with Myth PVR.'
 
     def initialise_main_view(self):
-        """ Populate UI main view with recording schedules."""
+        """ Populate UI main view with recording schedules. Returns False if not loaded, E.g. Myth not reachable."""
+        with self.__load_lock:
+            return self.__initialise_main_view()
+
+    def __initialise_main_view(self):
+        """ See initialise_main_view, called holding the load lock."""
         if debug_mode:
             debug_log('initialise_main_view')
 
-        self.ListSchedules.reset()              # Clear any items - Needed after rule deletion.
+        snapshot_generation = ScheduleSnapshot.Generation
         self.set_navigation_main()              # Set control tab order.
-        ClsRecSchedules.get_schedules()         # Request list of scheduled from Myth and create list of overrides.
-        ClsRecPrograms.cache_programs_list()    # Request and cache list of Programs.
+
+        # Request into separate lists, so the shown schedules (E.g. the startup snapshot) remain until both are loaded.
+        if pipelined_load:
+            # Request programs in the background, while schedules are requested.
+            programs_loaded = MythEventLoop.run_in_thread(ClsRecPrograms.request_programs_list)
+            schedules_error_info, schedules = ClsRecSchedules.request_schedules()
+            programs_error_info, programs = programs_loaded.result()
+        else:
+            schedules_error_info, schedules = ClsRecSchedules.request_schedules()
+            programs_error_info, programs = ClsRecPrograms.request_programs_list()
+        if schedules_error_info.Err or programs_error_info.Err:
+            return False
+
+        # Swap in the loaded schedules & overrides, then programs grouped per schedule.
+        self.ListSchedules.reset()              # Clear any items - Needed after rule deletion.
+        ClsRecSchedules.restore_snapshot(schedules)
+        ClsRecPrograms.swap_programs_list(programs)
         self.setFocus(self.ListSchedules)       # Set initial focus.
         self.note_selected_schedule()           # Note selected schedule list item and populate programs list.
 
+        # Save for showing at once on the next start, unless schedules changed while loading.
+        self.save_snapshot(snapshot_generation)
+        return True
+
+    def save_snapshot(self, snapshot_generation):
+        """ Save the schedules and programs for showing at once on the next start. Not saved if schedules changed
+        since the snapshot generation was noted, a later refresh saves."""
+        if startup_snapshot:
+            ScheduleSnapshot.save(ClsRecSchedules, ClsRecPrograms, snapshot_generation)
+
+    def show_snapshot_main_view(self):
+        """ Populate UI main view with the recording schedules saved by the last load, until loaded from Myth.
+        Returns False if there is no snapshot."""
+        with self.__load_lock:
+            return self.__show_snapshot_main_view()
+
+    def __show_snapshot_main_view(self):
+        """ See show_snapshot_main_view, called holding the load lock."""
+        if debug_mode:
+            debug_log('show_snapshot_main_view')
+
+        snapshot = ScheduleSnapshot.load()
+        if snapshot is None:
+            return False
+
+        self.ListSchedules.reset()
+        self.set_navigation_main()
+        ClsRecSchedules.restore_snapshot(snapshot[0])
+        ClsRecPrograms.restore_snapshot(snapshot[1])
+        self.setFocus(self.ListSchedules)
+        self.note_selected_schedule()
+        return True
+
     def update_recording_rule(self):
         """ Edit rule to match UI. Edit per new rule and http post to Myth."""
         if debug_mode:
@@ -536,6 +606,12 @@ class KodiGUI(pyxbmct.AddonFullWindow):
             self.show_status(_addon_.getLocalizedString(32028))  # 'Updating Myth recording schedule.'
             error_info = ClsRecSchedules.set_schedule_rule(new_rule_dict)
 
+            if ClsRecSchedules.UpdateSkipped:
+                # Nothing changed, so no update was posted and no schedule change will follow. The schedule change
+                # of an earlier update may still be to come, so it is still expected.
+                self.__show_update_results = False
+                self.show_status(_addon_.getLocalizedString(32057))  # 'No recording schedule changes.'
+
             if debug_mode:
                 debug_log('Update Rule Dict: ' + str(new_rule_dict))
                 debug_log('Result: ' + str(error_info.ErrMessage))
@@ -635,9 +711,16 @@ class KodiGUI(pyxbmct.AddonFullWindow):
     def show_updated_recording_rule_results(self):
         """ Refreshes the recording schedules list, programs cache & UI lists after a recording rule change.
         Called by class MythClient when a backend 'SCHEDULE_CHANGE' event occurs."""
+        with self.__load_lock:
+            return self.__show_updated_recording_rule_results()
+
+    def __show_updated_recording_rule_results(self):
+        """ See show_updated_recording_rule_results, called holding the load lock."""
         if debug_mode:
             debug_log('show_updated_recording_rule_results')
 
+        snapshot_generation = ScheduleSnapshot.Generation
+
         # Catch unexpected recording updates - Possibly another client and refresh.
         if not self.__expect_update:
             # 'Recording Schedules', 'Updated via another client.'
@@ -656,8 +739,40 @@ class KodiGUI(pyxbmct.AddonFullWindow):
                 self.__show_update_results = False
                 # Refresh the recording rule view and list of programs.
                 self.show_status(_addon_.getLocalizedString(32028))     # Updating Myth recording schedule.
-                ClsRecPrograms.cache_programs_list()                    # Update programs cache list.
+                if incremental_refresh:
+                    error_info = ClsRecPrograms.refresh_programs_list()     # Update changed programs in cache list.
+                    if debug_mode:
+                        debug_log('refresh_programs_list - changed: ' + str(ClsRecPrograms.ChangedCount))
+                else:
+                    error_info = ClsRecPrograms.cache_programs_list()       # Update programs cache list.
                 self.update_programs_list(self.__selected_list_index)   # Update the UI programs List.
+                if not error_info.Err:
+                    self.save_snapshot(snapshot_generation)
+
+    def resynchronise(self):
+        """ Reload schedules and programs after reconnecting to the Myth server, as events may have been missed.
+        Called via ReconnectSupervisor."""
+        with self.__load_lock:
+            return self.__resynchronise()
+
+    def __resynchronise(self):
+        """ See resynchronise, called holding the load lock."""
+        if debug_mode:
+            debug_log('resynchronise')
+
+        self.show_status(_addon_.getLocalizedString(32056))    # Reconnected to Myth PVR server.
+
+        # Schedule changes may have been missed, so cached recording rules and groups may be out of date.
+        ClsRecSchedules.invalidate_schedule_rules()
+        ClsRecSchedules.invalidate_metadata()
+        if self.viewMode == 'Main':
+            self.initialise_main_view()
+        else:
+            snapshot_generation = ScheduleSnapshot.Generation
+            error_info = ClsRecPrograms.cache_programs_list()   # Update programs cache list.
+            self.update_programs_list(self.__selected_list_index)
+            if not error_info.Err:
+                self.save_snapshot(snapshot_generation)
 
     def update_programs_list(self, list_index):
         """ List programs per selected recording schedule."""
@@ -665,6 +780,7 @@ class KodiGUI(pyxbmct.AddonFullWindow):
             debug_log('update_programs_list')
 
         self.ListPrograms.reset()
+        self.__marked_programs = []
         ClsRecPrograms.get_programs(list_index)
 
     def report_myth_backend_query_error(self, code_or_reason, reply_error_html):
@@ -691,7 +807,22 @@ class KodiGUI(pyxbmct.AddonFullWindow):
             #  Get the referenced program from the cashed list item and edit to create/delete override 'Dont Record'.
             list_index = int(self.ListPrograms.getSelectedPosition())
             self.__expect_update = True
-            result = ClsRecPrograms.toggle_override(list_index)
+            if self.__marked_programs:
+                # Disable or enable the marked programs together, refreshing once for the schedule changes.
+                self.show_status(_addon_.getLocalizedString(32059).format(len(self.__marked_programs)))
+                ScheduleChangeCoalescer.hold()
+                try:
+                    result = ClsRecPrograms.toggle_overrides(self.__marked_programs)
+                finally:
+                    # Myth sends a schedule change per update, once rescheduled. Wait for them, up to 10 seconds.
+                    ScheduleChangeCoalescer.release(ClsRecPrograms.ToggledCount, 10.0)
+                if debug_mode:
+                    debug_log('list_programs_click: toggled: ' + str(ClsRecPrograms.ToggledCount))
+                if result.Err and ClsRecPrograms.ToggledCount:
+                    # Show the programs updated before the error.
+                    self.update_programs_list(self.__selected_list_index)
+            else:
+                result = ClsRecPrograms.toggle_override(list_index)
             if not result.Err:
                 self.update_programs_list(self.__selected_list_index)
 
@@ -702,6 +833,32 @@ class KodiGUI(pyxbmct.AddonFullWindow):
         if debug_mode:
             debug_log('list_programs_click: html result: ' + result.ErrMessage)
 
+    def mark_program(self):
+        """ Mark or unmark the selected program, marked programs are disabled or enabled together on click."""
+        if self.viewMode != 'Main' or not self.pvr_connected:
+            return
+        try:
+            if self.getFocus() != self.ListPrograms:
+                return
+        except (RuntimeError, SystemError):
+            return
+
+        list_index = int(self.ListPrograms.getSelectedPosition())
+        if ClsRecPrograms.get_program_per_list_index(list_index) is None:
+            return
+        if debug_mode:
+            debug_log('mark_program: ' + str(list_index))
+
+        list_item = self.ListPrograms.getListItem(list_index)
+        if list_index in self.__marked_programs:
+            self.__marked_programs.remove(list_index)
+            list_item.setLabel(list_item.getLabel()[len(_marked_program_prefix_):])
+        else:
+            self.__marked_programs.append(list_index)
+            list_item.setLabel(_marked_program_prefix_ + list_item.getLabel())
+        # 'Marked programs: x - Select to disable or enable.'
+        self.show_status(_addon_.getLocalizedString(32058).format(len(self.__marked_programs)))
+
     def radio_button_recording_single_click(self):
         """ Toggle between RadioSeries."""
         if debug_mode:
@@ -827,6 +984,7 @@ class KodiGUI(pyxbmct.AddonFullWindow):
                         .setLabel(kbrd.getText())
                     self.__show_update_results = False
                     self.update_recording_rule()                 # Post update to Backend.
+                    ClsRecSchedules.invalidate_metadata()        # List the new group.
         else:
             self.__expect_update = True
             self.__show_update_results = False
@@ -1166,7 +1324,19 @@ class KodiGUI(pyxbmct.AddonFullWindow):
         dialog = xbmcgui.Dialog()
         dialog.ok(heading, message)
 
-class MythClient(myth_client.MythClient):
+class EventLoop(event_loop.EventLoop):
+
+    def callback_error(self, handle, err):
+        debug_log('EventLoop: ' + str(handle.callback) + ' - ' + repr(err), xbmc.LOGERROR)
+
+
+class EventCoalescer(myth_client.EventCoalescer):
+
+    def refresh_error(self, err):
+        debug_log('EventCoalescer: ' + str(self.refresh) + ' - ' + repr(err), xbmc.LOGERROR)
+
+
+class MythClient(myth_client.AsyncMythClient):
 
     def notify(self, myth_message):
         if myth_message == 'PROTO_REJECT':
@@ -1186,18 +1356,26 @@ class MythClient(myth_client.MythClient):
             if debug_mode:
                 debug_log('MythClient: SCHEDULE_CHANGE - View mode: ' + KodiScheduleUI.viewMode)
 
-            KodiScheduleUI.show_updated_recording_rule_results()
+            # The saved schedules and cached rules are out of date. A burst of schedule changes results in a single
+            # refresh.
+            ScheduleSnapshot.invalidate()
+            ClsRecSchedules.invalidate_schedule_rules()
+            ScheduleChangeCoalescer.post()
 
         if myth_message == 'MASTER_SHUTDOWN' or myth_message == 'SOCK_CLOSE':
             if debug_mode:
                 debug_log('MythClient: ' + myth_message)
-            # Disable further changes and allow exit only.
+            # Disable further changes and allow exit only. Schedule changes will be missed until reconnected.
             KodiScheduleUI.pvr_connected = False
+            ClsRecSchedules.invalidate_schedule_rules()
             KodiScheduleUI.mask_disconnected_message = True
             KodiScheduleUI.StatusLabel.reset()
             # 'Myth PVR server shutting down or disconnected' (or socket closed)
             KodiScheduleUI.StatusLabel.addLabel(_addon_.getLocalizedString(32039))
 
+        # Reconnect if the connection is lost.
+        KodiReconnect.connection_status(myth_message)
+
     def connection_closed(self):
         """ Called when socket closed."""
         if debug_mode:
@@ -1234,6 +1412,11 @@ class RecordingRule(myth_api.RecordingRule):
         # Show the recording options in UI.
         KodiScheduleUI.set_recording_options_gui(rule_dict)
 
+    def rule_changes(self, rule_changes):
+        """ Log recording rule changes to be updated."""
+        if debug_mode:
+            debug_log('Rule changes: ' + str(rule_changes))
+
     def status(self, status_string):
         """ Status info for UI (Schedules load x/x)."""
         KodiScheduleUI.StatusLabel.reset()
@@ -1280,6 +1463,12 @@ def debug_collect_info():
     debug_log('date_format=' + _settings_.getSetting(id="date_format"))
     debug_log('time_format=' + _settings_.getSetting(id="time_format"))
     debug_log('request_size=' + _settings_.getSetting(id="request_size"))
+    debug_log('request_threads=' + _settings_.getSetting(id="request_threads"))
+    debug_log('pipelined_load=' + _settings_.getSetting(id="pipelined_load"))
+    debug_log('load_while_connecting=' + _settings_.getSetting(id="load_while_connecting"))
+    debug_log('startup_snapshot=' + _settings_.getSetting(id="startup_snapshot"))
+    debug_log('incremental_refresh=' + _settings_.getSetting(id="incremental_refresh"))
+    debug_log('schedule_change_wait=' + _settings_.getSetting(id="schedule_change_wait"))
     debug_log('block_myth_pvr_shutdown=' + _settings_.getSetting(id="block_myth_pvr_shutdown"))
     debug_log('wake_on_lan=' + _settings_.getSetting(id="wake_on_lan"))
     debug_log('wake_on_lan_address=' + _settings_.getSetting(id="wake_on_lan_address"))
@@ -1349,6 +1538,18 @@ def check_settings_for_errors():
         display_setting_error(30014, "request_size")
         return True
 
+    request_threads = _settings_.getSetting(id="request_threads")
+    if request_threads == '':
+        display_setting_error(30021, "request_threads")
+        return True
+    elif int(request_threads) > 8 or int(request_threads) < 1:
+        display_setting_error(30021, "request_threads")
+        return True
+
+    if _settings_.getSetting(id="schedule_change_wait") == '':
+        display_setting_error(30024, "schedule_change_wait")
+        return True
+
 def display_setting_error(setting_localized_string_id, setting):
     """ Display settings errors."""
     KodiScheduleUI.display_message_dialog(_addon_.getLocalizedString(32043),
@@ -1372,6 +1573,12 @@ def reset_settings_to_defaults():
     _settings_.setSetting(id="wake_on_lan_address", value='?')
     _settings_.setSetting(id="connection_timeout_seconds", value='120')
     _settings_.setSetting(id="request_size", value='10')
+    _settings_.setSetting(id="request_threads", value='4')
+    _settings_.setSetting(id="pipelined_load", value='true')
+    _settings_.setSetting(id="load_while_connecting", value='true')
+    _settings_.setSetting(id="startup_snapshot", value='true')
+    _settings_.setSetting(id="incremental_refresh", value='true')
+    _settings_.setSetting(id="schedule_change_wait", value='500')
     _settings_.setSetting(id="reset_settings", value='false')
     _settings_.setSetting(id="debug", value='false')
     _settings_.setSetting(id="UserJob1", value='User Job 1')
@@ -1491,40 +1698,39 @@ def connect_myth_client():
     KodiScheduleUI.StatusLabel.reset()
     KodiScheduleUI.StatusLabel.addLabel(_addon_.getLocalizedString(32036))    # 'Trying to connect...'
     connection_timeout_seconds = int(_settings_.getSetting(id="connection_timeout_seconds"))
-    percent = 100
-    decrement = percent / float(connection_timeout_seconds)
-    myth_client_thread = threading.Thread(target=KodiMythClient)
-    user_cancel = False
-    progress_bar = xbmcgui.DialogProgress()
-    progress_bar.create(_addon_.getLocalizedString(32037))  # "Waiting connection: "
-
-    while percent > decrement and (not user_cancel):
-        if KodiScheduleUI.pvr_connected:
-            if debug_mode:
-                debug_log('KodiMythClient Connected')
-            break
-        else:
-            message = _addon_.getLocalizedString(32037) + str(int(percent))
-            progress_bar.update(int(percent), message, '', '')
-
-            if progress_bar.iscanceled():
-                user_cancel = True
+    start_time = time.time()
+    KodiReconnect.start()
+
+    # Only show progress if the handshake is not quick.
+    if not KodiMythClient.wait_connected(0.25):
+        progress_bar = xbmcgui.DialogProgress()
+        progress_bar.create(_addon_.getLocalizedString(32037))  # "Waiting connection: "
+
+        # Wait in short slices to update progress and notice cancel, returning as soon as connected.
+        while not KodiMythClient.wait_connected(0.25):
+            remaining_seconds = connection_timeout_seconds - (time.time() - start_time)
+            if remaining_seconds <= 0 or progress_bar.iscanceled():
                 break
+            percent = int(100 * remaining_seconds / connection_timeout_seconds)
+            message = _addon_.getLocalizedString(32037) + str(percent)
+            progress_bar.update(percent, message, '', '')
+        progress_bar.close()
 
-            if not myth_client_thread.is_alive():
-                myth_client_thread = threading.Thread(target=KodiMythClient)
-                myth_client_thread.start()
-
-            xbmc.sleep(1000)
-            percent -= decrement
-    progress_bar.close()
+    if debug_mode and KodiScheduleUI.pvr_connected:
+        debug_log('KodiMythClient Connected - ' + str(int((time.time() - start_time) * 1000)) + ' ms')
 
     if KodiScheduleUI.pvr_connected:
         KodiScheduleUI.clear_status()
         return 0
     else:
+        KodiReconnect.stop()
         return -1
 
+
+def resync_after_reconnect():
+    """ Called by ReconnectSupervisor on the event loop thread."""
+    MythEventLoop.run_in_thread(KodiScheduleUI.resynchronise)
+
 if __name__ == '__main__':
     # If debug mode.
     if _settings_.getSetting(id="debug") == 'true':
@@ -1552,7 +1758,8 @@ if __name__ == '__main__':
                                       _settings_.getSetting(id="client_security_pin"),
                                       _settings_.getSetting(id="date_format"),
                                       _settings_.getSetting(id="time_format"),
-                                      _settings_.getSetting(id="request_size"))
+                                      _settings_.getSetting(id="request_size"),
+                                      _settings_.getSetting(id="request_threads"))
 
     # If the option to Wake on LAN is selected - validate settings and wake.
     if _settings_.getSetting(id="wake_on_lan") == 'true':
@@ -1566,29 +1773,86 @@ if __name__ == '__main__':
     if debug_mode:
         debug_log('KodiMythClient.set_block_shutdown - ' + str(block_shutdown))
 
+    # Get the setting to load schedules and programs together.
+    if _settings_.getSetting(id="pipelined_load") == 'true':
+        pipelined_load = True
+
+    # Get the setting to load schedules and programs while connecting to Myth server events.
+    if _settings_.getSetting(id="load_while_connecting") == 'true':
+        load_while_connecting = True
+
+    # Get the setting to show the last loaded schedules at startup.
+    if _settings_.getSetting(id="startup_snapshot") == 'true':
+        startup_snapshot = True
+
+    # Get the setting to update only changed programs on a schedule change.
+    if _settings_.getSetting(id="incremental_refresh") == 'true':
+        incremental_refresh = True
+
+    # Myth protocol version and token for the event socket, also keys the saved schedules snapshot.
+    myth_protocol_version = '77 WindMark'
+
+    # Refresh once per burst of Myth server schedule changes.
+    ScheduleChangeCoalescer = EventCoalescer(
+        KodiScheduleUI.show_updated_recording_rule_results,
+        int(_settings_.getSetting(id="schedule_change_wait")) / 1000.0)
+
+    # Run the Myth server event socket, and background work, on an event loop thread.
+    MythEventLoop = EventLoop()
+    MythEventLoop.start()
+
     # Try to connect and subscribe to Myth server events.
     if debug_mode:
         debug_log('Init KodiMythClient')
-    KodiMythClient = MythClient(_settings_.getSetting(id="myth_host"),
-                                _settings_.getSetting(id="client_port"), '77 WindMark', block_shutdown, debug_mode)
+    KodiMythClient = MythClient(MythEventLoop, _settings_.getSetting(id="myth_host"),
+                                _settings_.getSetting(id="client_port"), myth_protocol_version, block_shutdown,
+                                debug_mode)
+    KodiReconnect = myth_client.ReconnectSupervisor(KodiMythClient, resync_after_reconnect, 1.0, 30.0)
+
+    # Init recording rule and programs classes ready for calling list of schedules.
+    ClsRecSchedules = RecordingRule()
+    ClsRecPrograms = Programs()
+
+    # Show the schedules saved by the last load at once, per Myth host and protocol version. They are revalidated
+    # by the load from Myth below.
+    if not os.path.isdir(_addon_profile_path_):
+        os.makedirs(_addon_profile_path_)
+    ScheduleSnapshot = myth_api.ScheduleSnapshot(os.path.join(_addon_profile_path_, 'schedules_snapshot.json'),
+                                                 [_settings_.getSetting(id="myth_host"),
+                                                  _settings_.getSetting(id="api_port"), myth_protocol_version])
+    if startup_snapshot:
+        KodiScheduleUI.show_snapshot_main_view()
+
+    # Cache the recording & storage group lists for the recording rule editor, and rules while browsing schedules.
+    MythEventLoop.run_in_thread(ClsRecSchedules.load_metadata)
+    SchedulePrefetcher = myth_api.ScheduleRulePrefetcher(ClsRecSchedules)
+
+    # The services API does not depend on the event socket, so load the main view while connecting.
+    # Editing is enabled once connected.
+    main_view_loaded = None
+    if load_while_connecting:
+        if debug_mode:
+            debug_log('__Main__ - KodiScheduleUI.initialise_main_view while connecting')
+        main_view_loaded = MythEventLoop.run_in_thread(KodiScheduleUI.initialise_main_view)
 
     # Wait here until connected.
     if debug_mode:
         debug_log('Init KodiMythClient - Waiting at connect_myth_client')
     fail_connect = connect_myth_client()
 
+    # Load again once connected if the load while connecting failed, E.g. the Myth server was still waking.
+    if main_view_loaded is not None and not main_view_loaded.result():
+        main_view_loaded = None
+
     if not fail_connect:
         if debug_mode:
             debug_log('Connected to Myth PVR')
 
-        # Init recording rule and programs classes ready for calling list of schedules.
-        ClsRecSchedules = RecordingRule()
-        ClsRecPrograms = Programs()
-
         # Init main view.
-        if debug_mode:
-            debug_log('__Main__ - KodiScheduleUI.initialise_main_view')
-        KodiScheduleUI.initialise_main_view()
+        if main_view_loaded is None:
+            if debug_mode:
+                debug_log('__Main__ - KodiScheduleUI.initialise_main_view')
+            KodiScheduleUI.initialise_main_view()
 
         # Loop at GUI.
         if debug_mode:
@@ -1596,6 +1860,7 @@ if __name__ == '__main__':
         KodiScheduleUI.doModal()
 
         # Disconnect from the Myth PVR backend. Also unblocks PVR shutdown if enabled.
+        KodiReconnect.stop()
         if KodiScheduleUI.pvr_connected:
             if debug_mode:
                 debug_log('KodiMythClient.un_subscribe')
@@ -1610,6 +1875,27 @@ if __name__ == '__main__':
         if debug_mode:
             debug_log('fail_connect = true', xbmc.LOGSEVERE)
 
+    # Stop prefetching recording rules.
+    SchedulePrefetcher.stop()
+
+    # Stop refreshing on schedule changes.
+    if debug_mode:
+        debug_log('ScheduleChangeCoalescer: events=' + str(ScheduleChangeCoalescer.events_received)
+                  + ' refreshes=' + str(ScheduleChangeCoalescer.refreshes_performed))
+    ScheduleChangeCoalescer.stop()
+
+    # Stop the event loop.
+    if debug_mode:
+        debug_log('KodiReconnect: attempts=' + str(KodiReconnect.reconnect_attempts)
+                  + ' reconnects=' + str(KodiReconnect.reconnects))
+    MythEventLoop.stop()
+    MythEventLoop.close()
+
+    # Close persistent HTTP connections to the Myth backend.
+    if debug_mode:
+        debug_log('MythAPI HTTP connections: ' + MythAPI.connection_stats())
+    MythAPI.close_connections()
+
     # Destroy the instance explicitly because underlying xbmcgui classes are not garbage-collected on exit.
     if debug_mode:
         debug_log('del KodiScheduleUI')
@@ -0,0 +1,260 @@
+# encoding=utf-8
+#                Copyright 2015 - 2020 Steven Carreck
+#                    GNU GENERAL PUBLIC LICENSE
+#                       Version 3, 29 June 2007
+#     This file is part of Myth PVR Schedules.
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__author__ = 'Steven Carreck'
+
+# A select based event loop, in the manner of asyncio which is not available to Kodi's Python 2.7.
+# Callbacks run one at a time on the loop thread. Only call_soon_threadsafe, run_in_thread and stop may be
+# called from other threads.
+
+import socket
+import select
+import threading
+import heapq
+import time
+from collections import deque
+
+
+class FutureTimeout(Exception):
+    pass
+
+
+class Future:
+    """ The result of work done on another thread. Waitable from any thread."""
+    def __init__(self):
+        self.__done = threading.Event()
+        self.__lock = threading.Lock()
+        self.__result = None
+        self.__exception = None
+        self.__callbacks = []
+
+    def done(self):
+        return self.__done.is_set()
+
+    def result(self, timeout=None):
+        """ Wait for and return the result, or raise the exception of the work.
+        Raises FutureTimeout if not done within timeout seconds."""
+        if not self.__done.wait(timeout):
+            raise FutureTimeout()
+        if self.__exception is not None:
+            raise self.__exception
+        return self.__result
+
+    def set_result(self, result):
+        self.__result = result
+        self.__set_done()
+
+    def set_exception(self, exception):
+        self.__exception = exception
+        self.__set_done()
+
+    def add_done_callback(self, callback):
+        """ Call callback(future) when done, at once if already done."""
+        with self.__lock:
+            if not self.__done.is_set():
+                self.__callbacks.append(callback)
+                return
+        callback(self)
+
+    def __set_done(self):
+        with self.__lock:
+            self.__done.set()
+            callbacks, self.__callbacks = self.__callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+
+class Handle:
+    """ A scheduled callback that may be cancelled."""
+    def __init__(self, callback, args):
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def _waker_socket_pair():
+    """ Returns a pair of connected sockets. socket.socketpair is not available on Windows."""
+    try:
+        return socket.socketpair()
+    except (AttributeError, socket.error):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen(1)
+            writer = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            writer.connect(listener.getsockname())
+            reader = listener.accept()[0]
+        finally:
+            listener.close()
+        return reader, writer
+
+
+class EventLoop:
+    def __init__(self):
+        self.__ready = deque()
+        self.__timers = []              # Heap of (time, sequence, handle).
+        self.__timer_sequence = 0
+        self.__readers = {}             # Handle per socket.
+        self.__writers = {}
+        self.__lock = threading.Lock()
+        self.__thread = None
+        self.__stopping = False
+        self.__waker_in, self.__waker_out = _waker_socket_pair()
+        self.__waker_in.setblocking(0)
+        self.__waker_out.setblocking(0)
+
+    def start(self):
+        """ Run the loop on its own thread."""
+        self.__thread = threading.Thread(target=self.run_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def run_forever(self):
+        self.__stopping = False
+        while not self.__stopping:
+            self.__run_once()
+
+    def stop(self, timeout=2.0):
+        """ Stop the loop, waiting for the loop thread if started by start()."""
+        self.call_soon_threadsafe(self.__stop)
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+            self.__thread = None
+
+    def __stop(self):
+        self.__stopping = True
+
+    def close(self):
+        self.__waker_in.close()
+        self.__waker_out.close()
+
+    def call_soon(self, callback, *args):
+        handle = Handle(callback, args)
+        self.__ready.append(handle)
+        return handle
+
+    def call_soon_threadsafe(self, callback, *args):
+        with self.__lock:
+            handle = self.call_soon(callback, *args)
+        self.__wake()
+        return handle
+
+    def call_later(self, delay_seconds, callback, *args):
+        handle = Handle(callback, args)
+        self.__timer_sequence += 1
+        heapq.heappush(self.__timers, (time.time() + delay_seconds, self.__timer_sequence, handle))
+        return handle
+
+    def add_reader(self, sock, callback, *args):
+        self.__readers[sock] = Handle(callback, args)
+
+    def remove_reader(self, sock):
+        return self.__readers.pop(sock, None) is not None
+
+    def add_writer(self, sock, callback, *args):
+        self.__writers[sock] = Handle(callback, args)
+
+    def remove_writer(self, sock):
+        return self.__writers.pop(sock, None) is not None
+
+    def run_in_thread(self, function, *args):
+        """ Run blocking work, e.g. Myth services API requests, on a worker thread. Returns a Future."""
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(function(*args))
+            except Exception, err:
+                future.set_exception(err)
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        return future
+
+    def __wake(self):
+        try:
+            self.__waker_out.send('x')
+        except socket.error:
+            pass    # Already woken, the buffer is full.
+
+    def __read_waker(self):
+        try:
+            while self.__waker_in.recv(4096):
+                pass
+        except socket.error:
+            pass
+
+    def __run_once(self):
+        # Wait for sockets until the next timer is due, or not at all if callbacks are ready.
+        if self.__ready:
+            timeout = 0
+        elif self.__timers:
+            timeout = max(0, self.__timers[0][0] - time.time())
+        else:
+            timeout = None
+
+        readers = [self.__waker_in] + self.__readers.keys()
+        writers = self.__writers.keys()
+        try:
+            readable, writable, failed = select.select(readers, writers, writers, timeout)
+        except (select.error, socket.error, ValueError):
+            # A socket was closed without being removed, drop closed sockets and carry on.
+            self.__remove_closed_sockets()
+            return
+
+        for sock in readable:
+            if sock is self.__waker_in:
+                self.__read_waker()
+            elif sock in self.__readers:
+                self.__ready.append(self.__readers[sock])
+        for sock in set(writable + failed):
+            if sock in self.__writers:
+                self.__ready.append(self.__writers[sock])
+
+        now = time.time()
+        while self.__timers and self.__timers[0][0] <= now:
+            self.__ready.append(heapq.heappop(self.__timers)[2])
+
+        # Run only the callbacks ready now, callbacks they schedule run on the next pass.
+        with self.__lock:
+            ready_count = len(self.__ready)
+        for i in range(ready_count):
+            with self.__lock:
+                handle = self.__ready.popleft()
+            if not handle.cancelled:
+                try:
+                    handle.callback(*handle.args)
+                except Exception, err:
+                    self.callback_error(handle, err)
+
+    def callback_error(self, handle, err):
+        """ Override me. A callback raised an exception, the loop carries on."""
+        pass
+
+    def __remove_closed_sockets(self):
+        for sockets in (self.__readers, self.__writers):
+            for sock in sockets.keys():
+                try:
+                    sock.fileno()
+                    select.select([sock], [], [], 0)
+                except (select.error, socket.error, ValueError):
+                    del sockets[sock]
@@ -20,8 +20,70 @@ __author__ = 'Steven Carreck'
 
 import socket
 import select
+import errno
+import threading
+import time
+import random
 import xbmc  # For logging.
 
+# Myth protocol messages are prefixed with their length, as 8 ASCII characters, and tokens are separated by '[]:[]'.
+_length_header_size = 8
+_token_separator = '[]:[]'
+
+
+class FrameDecoder:
+    """ Buffer data received from the Myth server and split it into complete messages."""
+    def __init__(self):
+        self.__buffer = ''
+
+    def feed(self, data):
+        """ Add received data. Returns a list of complete messages, each as a list of tokens.
+        Raises ValueError if a length header is not a number."""
+        self.__buffer += data
+        messages = []
+        position = 0
+        while len(self.__buffer) - position >= _length_header_size:
+            length = int(self.__buffer[position:position + _length_header_size])
+            if length < 0:
+                raise ValueError('Invalid message length: ' + str(length))
+            start = position + _length_header_size
+            if len(self.__buffer) - start < length:
+                break
+            messages.append(self.__buffer[start:start + length].split(_token_separator))
+            position = start + length
+        self.__buffer = self.__buffer[position:]
+        return messages
+
+
+class MythEvent:
+    """ A message received from the Myth server.
+    Replies are named by their first token, e.g. ACCEPT, REJECT or OK.
+    Backend messages, BACKEND_MESSAGE[]:[]<name> <arguments>[]:[]<extra tokens>, are named by their first word,
+    and system events, BACKEND_MESSAGE[]:[]SYSTEM_EVENT <name> <key> <value>...[]:[]<extra tokens>, by their
+    second word with their key value pairs also in values."""
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.is_backend_message = tokens[0] == 'BACKEND_MESSAGE' and len(tokens) > 1
+        self.is_system_event = False
+        self.arguments = []
+        self.values = {}
+        self.extra = []
+        if self.is_backend_message:
+            words = tokens[1].split()
+            self.extra = tokens[2:]
+            if words[:1] == ['SYSTEM_EVENT'] and len(words) > 1:
+                self.is_system_event = True
+                self.name = words[1]
+                self.arguments = words[2:]
+                self.values = dict(zip(words[2::2], words[3::2]))
+            else:
+                self.name = words[0] if words else ''
+                self.arguments = words[1:]
+        else:
+            self.name = tokens[0]
+            self.extra = tokens[1:]
+
+
 class MythClient:
     def __init__(self, myth_server_host, myth_server_port, myth_protocol_version, block_shutdown=False,
                  debug_mode=False):
@@ -40,6 +102,15 @@ class MythClient:
         self.__sock_excpt = []
         self.sock_err = False
         self.socket_timeout = 4.0
+        self.recv_size = 65536
+        self.connected = threading.Event()      # Set while subscribed to the Myth server events.
+        self.__event_handlers = {}
+        self.subscribe('ACCEPT', self.__on_accept)
+        self.subscribe('REJECT', self.__on_reject)
+        self.subscribe('OK', self.__on_client_connected)
+        self.subscribe('CLIENT_CONNECTED', self.__on_client_connected)
+        self.subscribe('SCHEDULE_CHANGE', self.__on_schedule_change)
+        self.subscribe('MASTER_SHUTDOWN', self.__on_master_shutdown)
 
     def __call__(self):
         if self.debug_mode:
@@ -51,8 +122,7 @@ class MythClient:
         self.notify('TRY_CONNECT')
         try_connect = self.__sock.connect_ex((self.__myth_server_host, int(self.__myth_server_port)))
         if try_connect == 0:
-            self.__connection_phase = 'Send Proto'
-            self.__send_data(self.__protocol_version)
+            self.connection_made(self.__sock)
             while True:
                 # Monitor socket changes and wait at select.
                 if self.debug_mode:
@@ -63,23 +133,19 @@ class MythClient:
                 if not self.sock_err:
                     try:
                         if len(self.__sock_in) > 0:
-                            data = self.__sock_in[0].recv(128)
-                            # print 'Reply:' + data
+                            data = self.__sock_in[0].recv(self.recv_size)
                             if data == "":
-                                self.notify('SOCK_CLOSE')
-                                if self.debug_mode:
-                                    self.debug_log('SOCK_CLOSE - Sock recv')
+                                self.connection_lost('Sock recv')
                                 break
                             else:
-                                # Interpret received data.
-                                self.__interpret(data)
+                                self.data_received(data)
+
+                    except ValueError, err:
+                        self.connection_lost(str(err))
+                        break
 
                     except socket.error, err:
-                        self.__sock.shutdown(socket.SHUT_RDWR)
-                        self.__sock.close()
-                        self.notify('SOCK_CLOSE')
-                        if self.debug_mode:
-                            self.debug_log('SOCK_CLOSE - sock error')
+                        self.connection_lost('sock error')
                         break
         else:
             self.__sock = None
@@ -87,51 +153,97 @@ class MythClient:
             if self.debug_mode:
                 self.debug_log('CONNECTION_TIMEOUT')
 
-    def __interpret(self, reply):
-        """ Manage subscription steps and notify of server schedule change events."""
+    def connection_made(self, sock):
+        """ Start the Myth protocol handshake on a newly connected socket."""
+        self.__sock = sock
+        self.__frame_decoder = FrameDecoder()
+        self.__proto_accepted = False
+        self.__subscription_sent = False
+        self.__subscribed = False
+        self.connected.clear()
+        self.sock_err = False
+        self.__connection_phase = 'Send Proto'
+        self.__send_data(self.__protocol_version)
+
+    def data_received(self, data):
+        """ Interpret each complete message received. Raises ValueError on a bad message length."""
+        for tokens in self.__frame_decoder.feed(data):
+            self.__interpret(tokens)
+
+    def connection_lost(self, reason):
+        """ Close the socket after it was closed by the server or failed."""
+        self.sock_err = True
+        self.connected.clear()
+        try:
+            self.__sock.shutdown(socket.SHUT_RDWR)
+            self.__sock.close()
+        except socket.error:
+            pass
+        self.notify('SOCK_CLOSE')
+        if self.debug_mode:
+            self.debug_log('SOCK_CLOSE - ' + reason)
+
+    def wait_connected(self, timeout_seconds=None):
+        """ Wait until subscribed to the Myth server events. Returns False on timeout."""
+        return self.connected.wait(timeout_seconds)
+
+    def subscribe(self, event_name, handler):
+        """ Call handler(event) with each MythEvent of event_name received, e.g. RECORDING_LIST_CHANGE,
+        UPDATE_PROG_INFO, or SYSTEM_EVENT for all system events. Handlers are called on the socket thread."""
+        self.__event_handlers.setdefault(event_name, []).append(handler)
+
+    def __interpret(self, tokens):
+        """ Dispatch a received message to the handlers of its event name."""
+        event = MythEvent(tokens)
         if self.debug_mode:
-            self.debug_log('__interpret')
-        # Check Myth Protocol accepted.
+            self.debug_log('__interpret - ' + event.name)
+        for handler in self.__event_handlers.get(event.name, ()):
+            handler(event)
+        if event.is_system_event:
+            for handler in self.__event_handlers.get('SYSTEM_EVENT', ()):
+                handler(event)
+
+    def __on_accept(self, event):
+        """ Myth Protocol accepted, subscribe to the server events as monitor."""
         if self.__connection_phase == 'Send Proto':
-            if reply.find('ACCEPT') > 0:
-                self.__proto_accepted = True
-                self.notify('PROTO_ACCEPT')
-                if self.debug_mode:
-                    self.debug_log('PROTO_ACCEPT')
-                # Subscribe to the server events as monitor.
-                self.__connection_phase = 'Subscribe'
-                self.__send_data(self.__subscribe_str)
-                self.__subscription_sent = True
-
-        if reply.find('REJECT') > 0:
-            # Server will close socket on rejection.
-            self.notify('PROTO_REJECT')
+            self.__proto_accepted = True
+            self.notify('PROTO_ACCEPT')
             if self.debug_mode:
-                self.debug_log('PROTO_REJECT')
+                self.debug_log('PROTO_ACCEPT')
+            self.__connection_phase = 'Subscribe'
+            self.__send_data(self.__subscribe_str)
+            self.__subscription_sent = True
+
+    def __on_reject(self, event):
+        # Server will close socket on rejection.
+        self.notify('PROTO_REJECT')
+        if self.debug_mode:
+            self.debug_log('PROTO_REJECT')
 
-        # Check Subscription OK, and we are the client being accepted..
+    def __on_client_connected(self, event):
+        """ Subscription OK, or we are the client being accepted."""
         if self.__connection_phase == 'Subscribe':
-            if reply.find('CLIENT_CONNECTED') > 0 and reply.find(socket.gethostname().upper()) \
-                    or reply.find('OK') > 0:
+            if event.name == 'OK' or event.values.get('HOSTNAME', '').upper() == socket.gethostname().upper():
                 self.__connection_phase = 'Monitor Rec Updates'
                 self.__subscribed = True
                 self.notify('CLIENT_CONNECTED')
+                self.connected.set()
                 if self.debug_mode:
                     self.debug_log('CLIENT_CONNECTED')
                 if self.__block_shutdown:
                     self.__send_data('14      BLOCK_SHUTDOWN')
 
-        # Notify if recording schedules changed.
+    def __on_schedule_change(self, event):
+        """ Notify if recording schedules changed."""
         if self.__connection_phase == 'Monitor Rec Updates':
-            if reply.find('SCHEDULE_CHANGE') > 0:
-                self.notify('SCHEDULE_CHANGE')
-                if self.debug_mode:
-                    self.debug_log('SCHEDULE_CHANGE')
-
-        if reply.find('MASTER_SHUTDOWN') > 0:
-            self.notify('MASTER_SHUTDOWN')
+            self.notify('SCHEDULE_CHANGE')
             if self.debug_mode:
-                self.debug_log('MASTER_SHUTDOWN')
+                self.debug_log('SCHEDULE_CHANGE')
+
+    def __on_master_shutdown(self, event):
+        self.notify('MASTER_SHUTDOWN')
+        if self.debug_mode:
+            self.debug_log('MASTER_SHUTDOWN')
 
     def __send_data(self, data):
         if self.debug_mode:
@@ -141,14 +253,7 @@ class MythClient:
                 self.__sock.sendall(data)
 
             except socket.error, err:
-                if self.debug_mode:
-                    self.debug_log('__send_data - socket error')
-                self.sock_err = True
-                self.__sock.shutdown(socket.SHUT_RDWR)
-                self.__sock.close()
-                self.notify('SOCK_CLOSE')
-                if self.debug_mode:
-                    self.debug_log('__send_data - SOCK_CLOSE')
+                self.connection_lost('__send_data - socket error')
 
     def notify(self, message):
         """ Override me. Myth server connection status & events."""
@@ -190,3 +295,252 @@ class MythClient:
         prefix = 'Myth PVR Schedules - myth_client.py: '
         xbmc.log(msg=prefix + message, level=log_level)
 
+
+class AsyncMythClient(MythClient):
+    """ A MythClient run by an event_loop.EventLoop, rather than a blocking thread per connection attempt.
+    Connection status and events are notified on the loop thread."""
+    def __init__(self, loop, myth_server_host, myth_server_port, myth_protocol_version, block_shutdown=False,
+                 debug_mode=False):
+        MythClient.__init__(self, myth_server_host, myth_server_port, myth_protocol_version, block_shutdown,
+                            debug_mode)
+        self.loop = loop
+        self.is_open = False    # Connecting or connected.
+        self.__myth_server_host = myth_server_host
+        self.__myth_server_port = int(myth_server_port)
+        self.__sock = None
+        self.__connect_timer = None
+
+    def __call__(self):
+        """ Try to connect to the Myth server. May be called from any thread, returns at once."""
+        self.is_open = True
+        self.loop.run_in_thread(self.__resolve)
+
+    def __resolve(self):
+        """ Look up the Myth server address on a worker thread, as name lookup blocks."""
+        try:
+            address = socket.getaddrinfo(self.__myth_server_host, self.__myth_server_port, socket.AF_INET,
+                                         socket.SOCK_STREAM)[0][4]
+        except socket.error, err:       # Includes socket.gaierror - E.g. the network is not up yet.
+            if self.debug_mode:
+                self.debug_log('AsyncMythClient resolve: ' + str(err))
+            self.loop.call_soon_threadsafe(self.__connect_failed)
+            return
+        self.loop.call_soon_threadsafe(self.__connect, address)
+
+    def __connect(self, address):
+        if self.debug_mode:
+            self.debug_log('AsyncMythClient connect')
+        self.notify('TRY_CONNECT')
+        try:
+            self.__sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.__sock.setblocking(0)
+            try_connect = self.__sock.connect_ex(address)
+        except socket.error:
+            self.__connect_failed()
+            return
+        if try_connect in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', None)):
+            self.loop.add_writer(self.__sock, self.__connect_ready)
+            self.__connect_timer = self.loop.call_later(self.socket_timeout, self.__connect_failed)
+        else:
+            self.__connect_failed()
+
+    def __connect_ready(self):
+        self.loop.remove_writer(self.__sock)
+        self.__connect_timer.cancel()
+        if self.__sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+            self.__connect_failed()
+            return
+        # Detect a backend that disappears without closing the socket, e.g. on power loss.
+        self.__sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self.__sock.settimeout(self.socket_timeout)
+        self.loop.add_reader(self.__sock, self.__read_ready)
+        self.connection_made(self.__sock)
+
+    def __connect_failed(self):
+        if self.__sock is not None:
+            self.loop.remove_writer(self.__sock)
+            self.__sock.close()
+            self.__sock = None
+        self.is_open = False
+        self.notify('CONNECTION_TIMEOUT')
+        if self.debug_mode:
+            self.debug_log('CONNECTION_TIMEOUT')
+
+    def __read_ready(self):
+        try:
+            data = self.__sock.recv(self.recv_size)
+            if data == "":
+                self.connection_lost('Sock recv')
+            else:
+                self.data_received(data)
+
+        except ValueError, err:
+            self.connection_lost(str(err))
+
+        except socket.error, err:
+            self.connection_lost('sock error')
+
+    def connection_lost(self, reason):
+        if self.__sock is not None:
+            self.loop.remove_reader(self.__sock)
+            self.__sock = None
+            self.is_open = False
+            MythClient.connection_lost(self, reason)
+
+
+class ReconnectSupervisor:
+    """ Reconnect an AsyncMythClient after its connection fails or closes, waiting a jittered exponential backoff
+    delay between attempts. resync() is called once on the loop thread after each successful reconnect.
+    Pass each message notified by the client to connection_status()."""
+    def __init__(self, client, resync, initial_delay_seconds=1.0, max_delay_seconds=60.0):
+        self.client = client
+        self.resync = resync
+        self.initial_delay_seconds = initial_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.reconnect_attempts = 0
+        self.reconnects = 0
+        self.__delay_seconds = initial_delay_seconds
+        self.__supervising = False
+        self.__has_connected = False
+        self.__retry_timer = None
+
+    def start(self):
+        """ Connect and keep connected. May be called from any thread."""
+        self.__supervising = True
+        self.client()
+
+    def stop(self):
+        """ Stop reconnecting, e.g. before disconnecting. May be called from any thread."""
+        self.__supervising = False
+        self.client.loop.call_soon_threadsafe(self.__cancel_retry)
+
+    def connection_status(self, message):
+        if message == 'CLIENT_CONNECTED':
+            self.__delay_seconds = self.initial_delay_seconds
+            if self.__has_connected:
+                self.reconnects += 1
+                self.resync()
+            self.__has_connected = True
+
+        elif message == 'PROTO_REJECT':
+            # Retrying will not help an incompatible protocol version.
+            self.__supervising = False
+
+        elif message in ('SOCK_CLOSE', 'CONNECTION_TIMEOUT') and self.__supervising:
+            self.__cancel_retry()
+            # Jitter the delay, so front-ends do not all retry a restarted backend at once.
+            delay_seconds = random.uniform(self.__delay_seconds / 2.0, self.__delay_seconds)
+            self.__delay_seconds = min(self.__delay_seconds * 2, self.max_delay_seconds)
+            self.__retry_timer = self.client.loop.call_later(delay_seconds, self.__retry)
+
+    def __retry(self):
+        self.__retry_timer = None
+        if self.__supervising and not self.client.is_open:
+            self.reconnect_attempts += 1
+            self.client()
+
+    def __cancel_retry(self):
+        if self.__retry_timer is not None:
+            self.__retry_timer.cancel()
+            self.__retry_timer = None
+
+
+class EventCoalescer:
+    """ Collapse a burst of events into a single refresh, called on a worker thread rather than the socket thread.
+    The refresh is called once no event has been posted for window_seconds, or at most max_wait_seconds after
+    the first event of a burst. While held, e.g. during a bulk update, events are collected for one refresh after
+    release."""
+    def __init__(self, refresh, window_seconds=0.5, max_wait_seconds=5.0):
+        self.refresh = refresh
+        self.window_seconds = window_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.events_received = 0
+        self.refreshes_performed = 0
+        self.__first_event_time = None
+        self.__last_event_time = 0
+        self.__hold_count = 0
+        self.__held_events = 0                  # Events posted since the hold started.
+        self.__expected_events = 0              # Events expected before the refresh after a hold.
+        self.__hold_deadline = 0                # Time to refresh after a hold, if fewer events are posted.
+        self.__stopped = False
+        self.__condition = threading.Condition()
+        self.__thread = threading.Thread(target=self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def post(self):
+        """ Note an event. Returns immediately."""
+        with self.__condition:
+            self.events_received += 1
+            self.__held_events += 1
+            self.__last_event_time = time.time()
+            if self.__first_event_time is None:
+                self.__first_event_time = self.__last_event_time
+            self.__condition.notify()
+
+    def hold(self):
+        """ Defer the refresh until release. Calls may be nested."""
+        with self.__condition:
+            if self.__hold_count == 0:
+                self.__held_events = 0
+                self.__expected_events = 0
+            self.__hold_count += 1
+
+    def release(self, expected_events=0, max_hold_seconds=0.0):
+        """ End a hold. The events caused by the held changes may still be to come, so the refresh is deferred until
+        expected_events have been posted since hold, or for at most max_hold_seconds. Events are then refreshed
+        once, after a further window_seconds."""
+        with self.__condition:
+            self.__hold_count = max(0, self.__hold_count - 1)
+            if self.__hold_count == 0:
+                self.__expected_events = expected_events
+                self.__hold_deadline = time.time() + max_hold_seconds
+                if self.__first_event_time is not None:
+                    self.__first_event_time = self.__last_event_time = time.time()
+            self.__condition.notify()
+
+    def stop(self):
+        """ Stop the worker thread. A pending refresh is discarded."""
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+        self.__thread.join(1.0)
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while True:
+                    if self.__stopped:
+                        return
+                    if self.__first_event_time is None or self.__hold_count:
+                        self.__condition.wait()
+                        continue
+
+                    # Wait for the events expected after a hold.
+                    if self.__held_events < self.__expected_events:
+                        hold_seconds = self.__hold_deadline - time.time()
+                        if hold_seconds > 0:
+                            self.__condition.wait(hold_seconds)
+                            continue
+                    if self.__expected_events:
+                        self.__expected_events = 0
+                        self.__first_event_time = time.time()
+
+                    # Wait for the burst of events to end.
+                    wait_seconds = min(self.__last_event_time + self.window_seconds,
+                                       self.__first_event_time + self.max_wait_seconds) - time.time()
+                    if wait_seconds <= 0:
+                        break
+                    self.__condition.wait(wait_seconds)
+
+                self.__first_event_time = None
+
+            self.refreshes_performed += 1
+            try:
+                self.refresh()
+            except Exception, err:
+                self.refresh_error(err)
+
+    def refresh_error(self, err):
+        """ Override me. The refresh raised an exception, the coalescer carries on."""
+        pass
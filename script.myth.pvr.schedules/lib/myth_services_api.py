@@ -19,37 +19,59 @@
 __author__ = 'Steven Carreck'
 
 import urllib2  # http://www.pythonforbeginners.com/python-on-the-web/how-to-use-urllib2-in-python/
-from urllib2 import URLError  # For url request errors
 import urllib
-from datetime import datetime  # https://docs.python.org/2/library/datetime.html
+import urlparse
+import httplib  # Persistent HTTP/1.1 connections - https://docs.python.org/2/library/httplib.html
+import socket
+import threading
+from datetime import date  # https://docs.python.org/2/library/datetime.html
 import time
+import calendar
 import json
+import os
+import copy
+from collections import OrderedDict
 
 _date_format = ''                   # Date format to be displayed in UI.
 _time_format = ''                   # Time format to be displayed in UI.
+_display_format_generation = 0      # Incremented when the UI date/time format changes, to reformat programs.
 _request_size = 10                  # Default HTTP Request chunk/records request size.
+_request_threads = 1                # Concurrent HTTP chunk requests for lists. (1 = serial)
 _list_index_to_rec_rule_id = {}     # Mapping of UI list item to recording rule id.
-_program_overrides = []             # List of recording overrides generated by RecordingRule and used by Programs.
+_program_overrides = None           # Index of recording overrides generated by RecordingRule and used by Programs.
 _myth_url_prefix = ''               # Myth server HTTP prefix for http requests.
+_http_pool_size = 4                 # Maximum persistent HTTP connections per backend host:port.
+_http_validator_cache_size = 256    # Maximum URLs to remember ETag/Last-Modified validators and bodies for.
+_metadata_ttl_seconds = 600         # Time to keep recording & storage group lists before requesting again.
 
 
 # API Initialization.
 class MythBackendAPI:
-    def __init__(self, backend_hostname, backend_port, backend_pin, date_format, time_format, request_size):
+    def __init__(self, backend_hostname, backend_port, backend_pin, date_format, time_format, request_size,
+                 request_threads=1):
         self.__BackEndIP_ = backend_hostname
         self.__BackEndPort_ = backend_port
         self.__BackEndPin_ = backend_pin
         self.__make_url_prefix()
-
-        global _date_format
-        _date_format = date_format
-
-        global _time_format
-        _time_format = time_format
+        self.set_date_time_format(date_format, time_format)
 
         global _request_size
         _request_size = int(request_size)
 
+        global _request_threads
+        _request_threads = max(1, int(request_threads))
+        _http_connection_pool.set_max_connections(max(_http_pool_size, _request_threads))
+
+    def set_date_time_format(self, date_format, time_format):
+        """ Change the UI date & time format. Cached programs are reformatted when next displayed."""
+        global _date_format
+        global _time_format
+        global _display_format_generation
+        if date_format != _date_format or time_format != _time_format:
+            _date_format = date_format
+            _time_format = time_format
+            _display_format_generation += 1
+
     def __make_url_prefix(self):
         global _myth_url_prefix
         _myth_url_prefix = 'http://' + self.__BackEndIP_ + ':' + self.__BackEndPort_
@@ -82,6 +104,17 @@ class MythBackendAPI:
         class_http_request.http_request()
         return class_http_request.HTML
 
+    def connection_stats(self):
+        """ Returns a string of persistent HTTP connection counts for logging."""
+        return 'new=' + str(_http_connection_pool.ConnectionsNew) \
+               + ' reused=' + str(_http_connection_pool.ConnectionsReused) \
+               + ' stale=' + str(_http_connection_pool.ConnectionsStale) \
+               + ' not_modified=' + str(_http_validator_cache.NotModifiedCount)
+
+    def close_connections(self):
+        """ Close persistent HTTP connections to the Myth backend."""
+        _http_connection_pool.close_all()
+
     def utf8_percent_decode(self, url_encoded):
         http_utf8_decode = urllib2.unquote(url_encoded.encode("utf8"))
         # http_utf8_decode = urllib.unquote_plus(url_encoded.encode("utf8"))
@@ -102,6 +135,211 @@ class ErrorInfo:
         self.ErrCodeOrReason = ''
         self.ErrMessage = ''
 
+class HTTPConnectionPool:
+    """ Persistent HTTP/1.1 keep-alive connections, pooled per backend host:port."""
+    def __init__(self, max_connections=4):
+        self.MaxConnections = max_connections   # Bounded pool size per host:port.
+        self.ConnectionsNew = 0                 # Count of new TCP connections made.
+        self.ConnectionsReused = 0              # Count of requests sent on a kept-alive connection.
+        self.ConnectionsStale = 0               # Count of kept-alive connections closed by the server.
+        self.__idle = {}                        # Idle connections per host:port.
+        self.__in_use = {}                      # Count of checked out connections per host:port.
+        self.__condition = threading.Condition()
+
+    def set_max_connections(self, max_connections):
+        """ Resize the pool. Idle connections above the new size are closed on release."""
+        with self.__condition:
+            self.MaxConnections = max(1, int(max_connections))
+            self.__condition.notify_all()
+
+    def request(self, method, url, body=None, headers=None, timeout=4):
+        """ Send a request on a pooled connection, returns the response and the read body.
+        A kept-alive connection closed by the server is replaced with a new connection. A request other than GET is only
+        sent again if it failed while being sent, as the backend may have acted on it before closing the connection."""
+        url_split = urlparse.urlsplit(url)
+        host = url_split.hostname
+        port = url_split.port or httplib.HTTP_PORT
+        path = url_split.path or '/'
+        if url_split.query:
+            path += '?' + url_split.query
+
+        while True:
+            connection, reused = self.__acquire(host, port, timeout)
+            request_sent = False
+            try:
+                connection.timeout = timeout
+                if connection.sock:
+                    connection.sock.settimeout(timeout)
+                connection.request(method, path, body, headers or {})
+                request_sent = True
+                response = connection.getresponse()
+                response_body = response.read()
+
+            except socket.timeout:
+                self.__release(host, port, connection, False)
+                raise
+
+            except (socket.error, httplib.HTTPException):
+                self.__release(host, port, connection, False)
+                if reused and (method == 'GET' or not request_sent):
+                    # Stale socket - The server closed the idle connection, retry on a new connection.
+                    self.ConnectionsStale += 1
+                    continue
+                raise
+
+            self.__release(host, port, connection, not response.will_close)
+            return response, response_body
+
+    def __acquire(self, host, port, timeout):
+        """ Check out an idle connection, or a new one if under the pool size. Blocks while the pool is full."""
+        key = (host, port)
+        with self.__condition:
+            while self.__in_use.get(key, 0) >= self.MaxConnections:
+                self.__condition.wait()
+            self.__in_use[key] = self.__in_use.get(key, 0) + 1
+            idle = self.__idle.get(key)
+            if idle:
+                self.ConnectionsReused += 1
+                return idle.pop(), True
+            self.ConnectionsNew += 1
+        return httplib.HTTPConnection(host, port, timeout=timeout), False
+
+    def __release(self, host, port, connection, keep_alive):
+        """ Return a connection to the pool, or close it if not reusable or the pool is full."""
+        key = (host, port)
+        with self.__condition:
+            self.__in_use[key] -= 1
+            idle = self.__idle.setdefault(key, [])
+            if keep_alive and len(idle) + self.__in_use[key] < self.MaxConnections:
+                idle.append(connection)
+                connection = None
+            self.__condition.notify()
+        if connection:
+            connection.close()
+
+    def close_all(self):
+        """ Close all idle connections."""
+        with self.__condition:
+            idle_connections = [connection for idle in self.__idle.values() for connection in idle]
+            self.__idle = {}
+        for connection in idle_connections:
+            connection.close()
+
+_http_connection_pool = HTTPConnectionPool(_http_pool_size)  # Shared by all HTTPRequest instances.
+
+class HTTPValidatorCache:
+    """ ETag/Last-Modified validators and response bodies per GET URL, least recently used dropped first.
+    Used to make conditional requests, and to return the cached body on 304 Not Modified."""
+    def __init__(self, max_entries=256):
+        self.MaxEntries = max_entries
+        self.NotModifiedCount = 0               # Count of 304 responses served from the cache.
+        self.__entries = OrderedDict()          # (ETag, Last-Modified, body) per URL.
+        self.__lock = threading.Lock()
+
+    def get(self, url):
+        """ Returns (ETag, Last-Modified, body) of a URL, or None."""
+        with self.__lock:
+            entry = self.__entries.pop(url, None)
+            if entry is not None:
+                self.__entries[url] = entry     # Most recently used.
+            return entry
+
+    def put(self, url, etag, last_modified, body):
+        with self.__lock:
+            self.__entries.pop(url, None)
+            self.__entries[url] = (etag, last_modified, body)
+            while len(self.__entries) > self.MaxEntries:
+                self.__entries.popitem(last=False)
+
+    def remove(self, url):
+        with self.__lock:
+            self.__entries.pop(url, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+_http_validator_cache = HTTPValidatorCache(_http_validator_cache_size)  # Shared by all HTTPRequest instances.
+
+def _http_request_pages(http_urls):
+    """ Generator of requested HTTPRequest pages in the order of the URL list.
+    Pages are requested concurrently over a bounded pool of worker threads, and returned in order as they arrive."""
+    results = {}                        # Requested pages per URL list index.
+    next_url = [0, False]               # Next URL list index to request, and cancelled flag.
+    condition = threading.Condition()
+
+    def worker():
+        while True:
+            with condition:
+                if next_url[1] or next_url[0] >= len(http_urls):
+                    return
+                url_index = next_url[0]
+                next_url[0] += 1
+            try:
+                class_http_requested = HTTPRequest(http_urls[url_index]).http_request()
+            except Exception, e:
+                # Return an error for the page, rather than leave the caller waiting for it.
+                class_http_requested = HTTPRequest(http_urls[url_index])
+                class_http_requested.ErrorInfo.Err = True
+                class_http_requested.ErrorInfo.ErrCodeOrReason = type(e).__name__
+                class_http_requested.ErrorInfo.ErrMessage = str(e)
+            with condition:
+                results[url_index] = class_http_requested
+                condition.notify_all()
+
+    for worker_count in range(min(_request_threads, len(http_urls))):
+        worker_thread = threading.Thread(target=worker)
+        worker_thread.daemon = True
+        worker_thread.start()
+
+    try:
+        for url_index in range(len(http_urls)):
+            with condition:
+                while url_index not in results:
+                    condition.wait()
+                class_http_requested = results.pop(url_index)
+            yield class_http_requested
+    finally:
+        # Stop requesting pages if the caller stops early. E.g. on error.
+        with condition:
+            next_url[1] = True
+
+def _map_concurrent(function, items):
+    """ Returns the list of function(item) per item, called concurrently over a bounded pool of worker threads.
+    An exception raised by function is raised here, once all workers have stopped."""
+    if _request_threads == 1 or len(items) <= 1:
+        return [function(item) for item in items]
+
+    results = [None] * len(items)
+    next_item = [0]                     # Next item list index to call.
+    exceptions = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if exceptions or next_item[0] >= len(items):
+                    return
+                item_index = next_item[0]
+                next_item[0] += 1
+            try:
+                results[item_index] = function(items[item_index])
+            except Exception, err:
+                with lock:
+                    exceptions.append(err)
+
+    worker_threads = []
+    for worker_count in range(min(_request_threads, len(items))):
+        worker_thread = threading.Thread(target=worker)
+        worker_thread.daemon = True
+        worker_thread.start()
+        worker_threads.append(worker_thread)
+    for worker_thread in worker_threads:
+        worker_thread.join()
+    if exceptions:
+        raise exceptions[0]
+    return results
+
 class HTTPRequest:
     def __init__(self, url, post_data_dict=None, request_timeout=4):
         self.ErrorInfo = ErrorInfo()            # Stores error info for reporting.
@@ -109,6 +347,7 @@ class HTTPRequest:
         self.PostDict = post_data_dict
         self.HTML = ''
         self.Info = ''
+        self.NotModified = False                # True if the HTML is the cached body of a 304 response.
         self.RequestTimeout = request_timeout
 
     def reset(self):
@@ -117,50 +356,130 @@ class HTTPRequest:
         self.PostDict = {}
         self.HTML = ''
         self.Info = ''
+        self.NotModified = False
         self.RequestTimeout = 4
 
     def http_request(self):
         """ Request via HTTP, sets HTTPRequest class attributes."""
+        headers = {'Accept-Charset': 'utf-8', 'Accept': 'application/json', 'Connection': 'keep-alive'}
+        validators = None
         if not self.PostDict:
-            # Build HTTP GET
-            http_request = urllib2.Request(self.URL)
-            http_request.add_header('Accept-Charset:', 'utf-8')
-            http_request.add_header('Accept:', 'application/json')
-            http_request.add_header('Connection:', 'keep-alive')
+            # Build HTTP GET - Conditional if validators were returned by an earlier request.
+            method = 'GET'
+            url_encoded = None
+            validators = _http_validator_cache.get(self.URL)
+            if validators is not None:
+                if validators[0]:
+                    headers['If-None-Match'] = validators[0]
+                if validators[1]:
+                    headers['If-Modified-Since'] = validators[1]
         else:
             # Build HTTP Post request.
+            method = 'POST'
             url_encoded = urllib.urlencode(self.PostDict)
-            http_request = urllib2.Request(self.URL, url_encoded)
-            http_request.add_header('Accept-Charset:', 'utf-8')
-            # http_request.add_header('Content-Type:', 'application/x-www-form-urlencoded; charset=utf-8')
-            http_request.add_header('Accept:', 'application/json')
-            http_request.add_header('Connection:', 'keep-alive')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
 
         try:
-            # Request the URL.
-            http_response = urllib2.urlopen(http_request, None, self.RequestTimeout)
-            self.Info = http_response.info()
-            self.HTML = http_response.read()
-            http_response.close()  # best practice to close
-            self.ErrorInfo.Err = False
-
-        except URLError, e:
-            if hasattr(e, 'reason'):
-                # We failed to reach a server.
-                self.ErrorInfo.ErrCodeOrReason = e.reason
-                if hasattr(e, 'read'):
-                    self.ErrorInfo.ErrMessage = e.read()
-                self.ErrorInfo.Err = True
-
-            elif hasattr(e, 'code'):
+            # Request the URL on a pooled keep-alive connection.
+            http_response, self.HTML = _http_connection_pool.request(method, self.URL, url_encoded, headers,
+                                                                     self.RequestTimeout)
+            self.Info = http_response.msg
+            self.NotModified = False
+
+            if http_response.status == httplib.NOT_MODIFIED and validators is not None:
+                # Unchanged since the earlier request.
+                self.HTML = validators[2]
+                self.NotModified = True
+                _http_validator_cache.NotModifiedCount += 1
+                self.ErrorInfo.Err = False
+            elif http_response.status >= 400:
                 # The server could not fulfill the request.
-                self.ErrorInfo.ErrCodeOrReason = e.code
-                if hasattr(e, 'read'):
-                    self.ErrorInfo.ErrMessage = e.read()
+                self.ErrorInfo.ErrCodeOrReason = http_response.reason
+                self.ErrorInfo.ErrMessage = self.HTML
                 self.ErrorInfo.Err = True
+            else:
+                self.ErrorInfo.Err = False
+                if method == 'GET':
+                    etag = http_response.getheader('ETag')
+                    last_modified = http_response.getheader('Last-Modified')
+                    if etag or last_modified:
+                        _http_validator_cache.put(self.URL, etag, last_modified, self.HTML)
+                    elif validators is not None:
+                        _http_validator_cache.remove(self.URL)
+
+        except (socket.error, httplib.HTTPException), e:
+            # We failed to reach a server.
+            self.ErrorInfo.ErrCodeOrReason = str(e)
+            self.ErrorInfo.Err = True
 
         return self
 
+class MetadataCache:
+    """ Lists that rarely change, E.g. recording groups, kept for a time to live and shared by RecordingRule
+    instances."""
+    def __init__(self, ttl_seconds=600):
+        self.TTLSeconds = ttl_seconds
+        self.__entries = {}                     # (Time loaded, list) per name.
+        self.__lock = threading.Lock()
+
+    def get(self, name):
+        """ Returns a copy of a list, or None if not loaded or expired."""
+        with self.__lock:
+            entry = self.__entries.get(name)
+            if entry is not None and time.time() - entry[0] < self.TTLSeconds:
+                return list(entry[1])
+
+    def put(self, name, list_value):
+        with self.__lock:
+            self.__entries[name] = (time.time(), list(list_value))
+
+    def invalidate(self, name=None):
+        """ Forget a list, or all lists."""
+        with self.__lock:
+            if name is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(name, None)
+
+_metadata_cache = MetadataCache(_metadata_ttl_seconds)    # Shared by all RecordingRule instances.
+
+class RuleDetailCache:
+    """ Recording rule dicts, with decoded filters, per recording rule id. Copies are returned, so a rule may be
+    edited by the caller. Invalidated on schedule change."""
+    def __init__(self):
+        self.Generation = 0                     # Incremented by invalidate().
+        self.__rules = {}
+        self.__lock = threading.Lock()
+
+    def get(self, recording_rule_id):
+        """ Returns a copy of a recording rule dict, or None."""
+        with self.__lock:
+            rule_dict = self.__rules.get(recording_rule_id)
+        if rule_dict is not None:
+            return copy.deepcopy(rule_dict)
+
+    def put(self, recording_rule_id, rule_dict, generation=None):
+        """ Cache a copy of a recording rule dict. Pass the Generation noted before requesting the rule, to not
+        cache a rule requested before an invalidate."""
+        rule_dict = copy.deepcopy(rule_dict)
+        with self.__lock:
+            if generation is None or generation == self.Generation:
+                self.__rules[recording_rule_id] = rule_dict
+
+    def __contains__(self, recording_rule_id):
+        return recording_rule_id in self.__rules
+
+    def invalidate(self, recording_rule_id=None):
+        """ Forget a recording rule, or all recording rules."""
+        with self.__lock:
+            self.Generation += 1
+            if recording_rule_id is None:
+                self.__rules.clear()
+            else:
+                self.__rules.pop(recording_rule_id, None)
+
+_rule_detail_cache = RuleDetailCache()      # Shared by RecordingRule and Programs.
+
 class RecordingRule:
     def __init__(self):
         self.ErrorInfo = ErrorInfo()            # Stores error info for reporting.
@@ -168,12 +487,15 @@ class RecordingRule:
         self.__load_count = 0                   # Counter for schedules list loading reporting.
         self.__list_index = 0                   # Index of currently returned list info.
         self.__recording_rule_dict = {}         # Dict of recording rules includes added recording filter info.
+        self.__saved_rule_dict = None           # Copy of the recording rule as loaded or last updated.
+        self.__listed_rules = []                # Recording rules per UI list index, for a snapshot.
+        self.UpdateSkipped = False              # True if the last set_schedule_rule found no changes to post.
 
         global _list_index_to_rec_rule_id       # Mapping of UI list index to recording rule id.
         _list_index_to_rec_rule_id = {}
 
         global _program_overrides               # Add when a rec type 8 (Don' Record) is found for programs to resolve.
-        _program_overrides = []
+        _program_overrides = ProgramOverrides()
 
     def reset(self):
         self.ErrorInfo.reset()
@@ -181,12 +503,13 @@ class RecordingRule:
         self.__load_count = 0
         self.__list_index = 0
         self.__recording_rule_dict = {}
+        self.__listed_rules = []
 
         global _list_index_to_rec_rule_id
         _list_index_to_rec_rule_id = {}
 
         global _program_overrides
-        _program_overrides = []
+        _program_overrides = ProgramOverrides()
 
     def get_schedules(self):
         """ Request a recording all schedules from Myth and set RecordingRule attributes."""
@@ -201,16 +524,33 @@ class RecordingRule:
 
         return class_http_requested.ErrorInfo
 
-    def __request_schedules(self):
-        """ Query the Myth backend for a recording schedule."""
+    def request_schedules(self):
+        """ Request all recording schedules from Myth without changing the listed schedules. Returns ErrorInfo and the
+        schedules, to be listed by restore_snapshot. E.g. swapped for schedules shown while loading."""
+        self.__total_available = 1
+        self.__load_count = 0
+        requested_schedules = {'RecRules': [], 'Overrides': []}
+
+        class_http_requested = self.__request_schedules(requested_schedules)
+
+        if class_http_requested.ErrorInfo.Err:
+            self.error(class_http_requested.ErrorInfo)
+
+        return class_http_requested.ErrorInfo, requested_schedules
+
+    def __request_schedules(self, requested_schedules=None):
+        """ Query the Myth backend for a recording schedule.
+        Schedules are listed, or if given, added to requested_schedules as a snapshot."""
+        if _request_threads > 1:
+            return self.__request_schedules_concurrent(requested_schedules)
+
         schedules_index = 0
         global _request_size
         class_http_request = HTTPRequest('')
 
         while schedules_index < self.__total_available:
             # Set URL String.
-            http_url = _myth_url_prefix + '/Dvr/GetRecordScheduleList?StartIndex='\
-                                        + str(schedules_index) + '&Count=' + str(_request_size)
+            http_url = self.__schedules_url(schedules_index)
 
             # Request schedules per index & record count, and verify request ok.
             class_http_request = HTTPRequest(http_url)
@@ -220,7 +560,7 @@ class RecordingRule:
                 # Notify error.
                 return class_http_requested
             else:
-                class_err_info = self.__json_to_schedule_list(class_http_requested.HTML)
+                class_err_info = self.__json_to_schedule_list(class_http_requested.HTML, requested_schedules)
                 if class_err_info.Err:
                     class_http_requested.ErrorInfo.Err = True
                     class_http_requested.ErrorInfo.ErrCodeOrReason = class_err_info.ErrCodeOrReason
@@ -229,8 +569,47 @@ class RecordingRule:
                 schedules_index += _request_size
         return class_http_request
 
-    def __json_to_schedule_list(self, json_reply):
-        """ Build list recording rule of dicts - Filter override rules and the recording template."""
+    def __request_schedules_concurrent(self, requested_schedules=None):
+        """ Query the Myth backend for all recording schedules in chunks.  The first chunk returns the total
+        available, the remaining chunks are requested concurrently and decoded in index order."""
+        class_http_requested = HTTPRequest(self.__schedules_url(0)).http_request()
+
+        if class_http_requested.ErrorInfo.Err:
+            # Notify error.
+            return class_http_requested
+
+        class_err_info = self.__json_to_schedule_list(class_http_requested.HTML, requested_schedules)
+        if class_err_info.Err:
+            class_http_requested.ErrorInfo.Err = True
+            class_http_requested.ErrorInfo.ErrCodeOrReason = class_err_info.ErrCodeOrReason
+            class_http_requested.ErrorInfo.ErrMessage = class_err_info.ErrMessage
+            return class_http_requested
+
+        # Decoded in index order, so the UI list index mapping and overrides are identical to a serial load.
+        http_urls = [self.__schedules_url(schedules_index)
+                     for schedules_index in range(_request_size, self.__total_available, _request_size)]
+
+        for class_http_requested in _http_request_pages(http_urls):
+            if class_http_requested.ErrorInfo.Err:
+                # Notify error.
+                return class_http_requested
+
+            class_err_info = self.__json_to_schedule_list(class_http_requested.HTML, requested_schedules)
+            if class_err_info.Err:
+                class_http_requested.ErrorInfo.Err = True
+                class_http_requested.ErrorInfo.ErrCodeOrReason = class_err_info.ErrCodeOrReason
+                class_http_requested.ErrorInfo.ErrMessage = class_err_info.ErrMessage
+                return class_http_requested
+        return class_http_requested
+
+    def __schedules_url(self, schedules_index):
+        """ Returns the URL to request a chunk of recording schedules from an index."""
+        return _myth_url_prefix + '/Dvr/GetRecordScheduleList?StartIndex=' \
+                                + str(schedules_index) + '&Count=' + str(_request_size)
+
+    def __json_to_schedule_list(self, json_reply, requested_schedules=None):
+        """ Build list recording rule of dicts - Filter override rules and the recording template.
+        Added to requested_schedules, as a snapshot, if given."""
         class_err_info = ErrorInfo()
         global _program_overrides
 
@@ -238,7 +617,8 @@ class RecordingRule:
             RecRuleList = json.loads(json_reply)
             self.__total_available = int(RecRuleList['RecRuleList']['TotalAvailable'])
             if self.__total_available <= 1:
-                self.schedules_list({}, 0)
+                if requested_schedules is None:
+                    self.schedules_list({}, 0)
                 return class_err_info
 
             RecRules = RecRuleList['RecRuleList']['RecRules']
@@ -254,26 +634,24 @@ class RecordingRule:
 
                 if RecRule_Type != 'Not Recording':
                     if RecRule_Type != 'Override Recording':
-                        # Record a mapping of list index to recording rule id for UI list.
-                        _list_index_to_rec_rule_id[str(self.__list_index)] = RecRule_Id
                         # Add rule to UI list.
-                        self.schedules_list(RecRule, self.__list_index)
-                        self.__list_index += 1
+                        self.__list_rule(RecRule, requested_schedules)
 
                     # Record a list of program overrides used to match program list.
                     # For Myth PVR Schedules an override with a parent id is created.
                     # For MythWeb when selecting 'Dont Record' a rule is created as override, with no parent id.
                     elif RecRule_Type == 'Override Recording':
-                        _program_overrides.append(RecRule_ChanId + ']' + RecRule_StartTime)
-                        _program_overrides.append(RecRule_ParentId)
+                        if requested_schedules is None:
+                            _program_overrides.add(RecRule_ChanId, RecRule_StartTime, RecRule_ParentId, RecRule_Id)
+                        else:
+                            requested_schedules['Overrides'].append([RecRule_ChanId, RecRule_StartTime,
+                                                                     RecRule_ParentId, RecRule_Id])
 
                         # If a MythWeb override (no parent id) add it as a separate recording rule.
                         if RecRule_ParentId == '0':
                             # Edit title to advise this is a MythWeb override.
                             RecRule['Title'] = 'MythWeb: ' + RecRule_Title + "  " + RecRule_Type
-                            _list_index_to_rec_rule_id[str(self.__list_index)] = RecRule_Id
-                            self.schedules_list(RecRule, self.__list_index)
-                            self.__list_index += 1
+                            self.__list_rule(RecRule, requested_schedules)
 
                     # Report load status.
                     self.__load_count += 1
@@ -291,6 +669,34 @@ class RecordingRule:
 
         return class_err_info
 
+    def __list_rule(self, RecRule, requested_schedules=None):
+        """ Add a recording rule to the UI list, or to requested_schedules if given."""
+        if requested_schedules is not None:
+            requested_schedules['RecRules'].append(RecRule)
+            return
+
+        # Record a mapping of list index to recording rule id for UI list.
+        _list_index_to_rec_rule_id[str(self.__list_index)] = RecRule['Id']
+        self.schedules_list(RecRule, self.__list_index)
+        self.__listed_rules.append(RecRule)
+        self.__list_index += 1
+
+    def snapshot(self):
+        """ Returns the listed recording rules and program overrides, to be saved by ScheduleSnapshot."""
+        return {'RecRules': self.__listed_rules, 'Overrides': _program_overrides.items()}
+
+    def restore_snapshot(self, snapshot):
+        """ List the recording rules and program overrides of a snapshot, or of request_schedules, as if requested
+        from Myth."""
+        self.reset()
+        for RecRule in snapshot['RecRules']:
+            self.__list_rule(RecRule)
+        if not self.__listed_rules:
+            self.schedules_list({}, 0)
+
+        for chan_id, start_time, parent_rule_id, override_rule_id in snapshot['Overrides']:
+            _program_overrides.add(chan_id, start_time, parent_rule_id, override_rule_id)
+
     def schedules_list(self, rec_rule_dict, ui_list_index):
         """ Recording Schedules.  List of Dicts - Override me."""
         pass
@@ -302,22 +708,53 @@ class RecordingRule:
         # Clear any previous http error info.
         self.ErrorInfo.reset()
         self.__recording_rule_dict = {}
+        self.__saved_rule_dict = None
 
         # Get mapping of list index to recording rule id.
         recording_rule_id = _list_index_to_rec_rule_id[str(ui_list_index)]
 
+        # Use the rule if cached, E.g. prefetched while browsing the list of schedules.
+        self.__recording_rule_dict = _rule_detail_cache.get(recording_rule_id)
+        if self.__recording_rule_dict is not None:
+            self.__saved_rule_dict = copy.deepcopy(self.__recording_rule_dict)
+            self.schedule_rule(self.__recording_rule_dict)
+            return self.ErrorInfo
+
         # Http request schedule per rule Id.
-        class_http_requested = self.__request_schedule(recording_rule_id)
+        generation = _rule_detail_cache.Generation
+        class_http_requested, self.__recording_rule_dict = self.__request_schedule(recording_rule_id)
 
         if class_http_requested.ErrorInfo.Err:
             self.error(class_http_requested.ErrorInfo)
         else:
+            _rule_detail_cache.put(recording_rule_id, self.__recording_rule_dict, generation)
+            self.__saved_rule_dict = copy.deepcopy(self.__recording_rule_dict)
             self.schedule_rule(self.__recording_rule_dict)
 
         return class_http_requested.ErrorInfo
 
+    def prefetch_schedule_rule(self, ui_list_index):
+        """ Request and cache a recording rule, if not cached. Returns False if not found or on error."""
+        recording_rule_id = _list_index_to_rec_rule_id.get(str(ui_list_index))
+        if recording_rule_id is None:
+            return False
+        if recording_rule_id in _rule_detail_cache:
+            return True
+
+        generation = _rule_detail_cache.Generation
+        class_http_requested, recording_rule_dict = self.__request_schedule(recording_rule_id)
+        if class_http_requested.ErrorInfo.Err:
+            return False
+        _rule_detail_cache.put(recording_rule_id, recording_rule_dict, generation)
+        return True
+
+    def invalidate_schedule_rules(self):
+        """ Request recording rules again when next used. E.g. on schedule change."""
+        _rule_detail_cache.invalidate()
+
     def __request_schedule(self, recording_rule_id):
-        """ Query the Myth backend for a specific recording schedule."""
+        """ Query the Myth backend for a specific recording schedule. Returns the HTTPRequest and the recording rule
+        dict, including decoded filters."""
         # Set URL String.
         http_url = _myth_url_prefix + '/Dvr/GetRecordSchedule?RecordId=' + str(recording_rule_id)
 
@@ -327,19 +764,20 @@ class RecordingRule:
 
         if class_http_requested.ErrorInfo.Err:
             # Notify error.
-            return class_http_requested
+            return class_http_requested, {}
         else:
-            class_err_info = self.__json_to_schedule_rule(class_http_requested.HTML)
+            class_err_info, schedule_dict = self.__json_to_schedule_rule(class_http_requested.HTML)
             if class_err_info.Err:
                 class_http_requested.ErrorInfo.Err = True
                 class_http_requested.ErrorInfo.ErrCodeOrReason = class_err_info.ErrCodeOrReason
                 class_http_requested.ErrorInfo.ErrMessage = class_err_info.ErrMessage
-                return class_http_requested
-        return class_http_requested
+                return class_http_requested, {}
+        return class_http_requested, schedule_dict
 
     def __json_to_schedule_rule(self, json_html):
-        """ Query the Myth backend for a specific recording schedule."""
+        """ Decode a recording schedule. Returns ErrorInfo and the recording rule dict."""
         class_err_info = ErrorInfo()
+        schedule_dict = {}
 
         try:
             # Decode json.
@@ -357,18 +795,18 @@ class RecordingRule:
             # Add filters dict to returned recording rule dict.
             schedule_dict.update(recording_filters_dict)
 
-            self.__recording_rule_dict = schedule_dict
-
         except ValueError:
             class_err_info.Err = True
             class_err_info.ErrCodeOrReason = 'ValueError'
             class_err_info.ErrMessage = 'Value Error'
+            schedule_dict = {}
 
         except KeyError:
             class_err_info.Err = True
             class_err_info.ErrCodeOrReason = 'KeyError'
             class_err_info.ErrMessage = 'Key Error'
-        return class_err_info
+            schedule_dict = {}
+        return class_err_info, schedule_dict
 
     def schedule_rule(self, rule_dict):
         """ Recording Rule Dict. - Override me."""
@@ -428,13 +866,23 @@ class RecordingRule:
         return filter_dict
 
     def set_schedule_rule(self, recording_rule_dict):
-        """ Edits a specific recording rule.."""
+        """ Edits a specific recording rule. The update is skipped, and UpdateSkipped set, if the rule is unchanged
+        since loaded or last updated. Each update causes the backend to reschedule."""
         # Clear any previous http error data.
         self.ErrorInfo.reset()
+        self.UpdateSkipped = False
 
         # Return the recording rule dict with 'Filter set to encoded string int of added filter settings.
         recording_rule_dict = self.__recording_filter_from_dict(recording_rule_dict)
 
+        # Compare with the rule as loaded, including the decoded filters.
+        if self.__saved_rule_dict is not None and self.__saved_rule_dict.get('Id') == recording_rule_dict.get('Id'):
+            rule_changes = self.__rule_changes(self.__saved_rule_dict, recording_rule_dict)
+            self.rule_changes(rule_changes)
+            if not rule_changes:
+                self.UpdateSkipped = True
+                return self.ErrorInfo
+
         # Preserve the current rule including added Filters for further edits.
         # Copy the rule and modify for posting to Myth. - Translate and remove added filter items.
         recording_rule_post_dict = dict(recording_rule_dict)
@@ -463,6 +911,7 @@ class RecordingRule:
         del recording_rule_post_dict['FilterThisChannel']
 
         # Request Myth rule update.
+        _rule_detail_cache.invalidate(recording_rule_post_dict['RecordId'])
         class_http_requested = self.__update_recording_rule(recording_rule_post_dict)
 
         # Report http post error.
@@ -477,8 +926,26 @@ class RecordingRule:
                                                         + str(class_http_requested.HTML)
             self.error(class_http_requested.ErrorInfo)
 
+        if not class_http_requested.ErrorInfo.Err:
+            # Further edits are compared with the updated rule.
+            self.__saved_rule_dict = copy.deepcopy(recording_rule_dict)
+
         return class_http_requested.ErrorInfo
 
+    def __rule_changes(self, saved_rule_dict, recording_rule_dict):
+        """ Returns a dict of (saved value, new value) per changed recording rule item."""
+        rule_changes = {}
+        for key in set(saved_rule_dict) | set(recording_rule_dict):
+            saved_value = saved_rule_dict.get(key)
+            new_value = recording_rule_dict.get(key)
+            if _rule_value(saved_value) != _rule_value(new_value):
+                rule_changes[key] = (saved_value, new_value)
+        return rule_changes
+
+    def rule_changes(self, rule_changes):
+        """ Changed recording rule items per update, E.g. for logging. Empty if unchanged. - Override me."""
+        pass
+
     def __recording_filter_from_dict(self, recording_rule_dict):
         """ Return the recording rule dict with 'Filter set to encoded string int of filter settings."""
         # Encode Filters to BCD.
@@ -513,6 +980,7 @@ class RecordingRule:
         recording_rule_id = _list_index_to_rec_rule_id[str(ui_list_index)]
 
         # Request recording rule deletion.
+        _rule_detail_cache.invalidate(recording_rule_id)
         schedule_id_dict = {'RecordId': str(recording_rule_id)}
         class_http_requested = self.__remove_recording_rule(schedule_id_dict)
 
@@ -539,7 +1007,11 @@ class RecordingRule:
         return class_http_requested
 
     def get_recording_groups(self):
-        """ Returns a list of Myth Backend recording groups."""
+        """ Returns a list of Myth Backend recording groups. Cached, the list may be edited by the caller."""
+        rec_group_list = _metadata_cache.get('RecGroupList')
+        if rec_group_list is not None:
+            return rec_group_list
+
         # http request schedule per rule Id.
         class_http_requested = self.__request_recording_groups()
 
@@ -549,6 +1021,7 @@ class RecordingRule:
         else:
             convert_to_dict = json.loads(class_http_requested.HTML)
             rec_group_list = convert_to_dict['StringList']
+            _metadata_cache.put('RecGroupList', rec_group_list)
             return rec_group_list
 
     def __request_recording_groups(self):
@@ -560,7 +1033,10 @@ class RecordingRule:
         return class_http_requested
 
     def storage_groups(self):
-        """ Returns a list of Myth Backend storage groups."""
+        """ Returns a list of Myth Backend storage groups. Cached, the list may be edited by the caller."""
+        group_list = _metadata_cache.get('StorageGroupDirs')
+        if group_list is not None:
+            return group_list
 
         class_http_requested = self.__request_storage_groups()
 
@@ -579,6 +1055,7 @@ class RecordingRule:
                 if (group_name != 'Banners') and (group_name != 'Coverart') and (group_name != 'DB Backups') \
                         and (group_name != 'Fanart') and (group_name != 'Screenshots') and (group_name != 'Streaming'):
                     group_list.append(group_name)
+            _metadata_cache.put('StorageGroupDirs', group_list)
             return group_list
 
     def __request_storage_groups(self):
@@ -589,6 +1066,15 @@ class RecordingRule:
         class_http_requested = class_http_request.http_request()
         return class_http_requested
 
+    def load_metadata(self):
+        """ Request and cache the recording & storage group lists, E.g. in the background at startup."""
+        self.get_recording_groups()
+        self.storage_groups()
+
+    def invalidate_metadata(self):
+        """ Request the recording & storage group lists again when next used. E.g. after adding a group."""
+        _metadata_cache.invalidate()
+
     def status(self, status_string):
         """ Status info for UI (Programs load x/x). - Override me."""
         pass
@@ -597,6 +1083,201 @@ class RecordingRule:
         """ Error info. - Override me."""
         pass
 
+class ScheduleRulePrefetcher:
+    """ Request and cache recording rules on a worker thread. E.g. the focused schedule and its neighbours, so
+    opening the rule editor does not wait for the backend. A new prefetch replaces rules not yet requested."""
+    def __init__(self, recording_rule):
+        self.RecordingRule = recording_rule
+        self.__pending = []                     # UI list indexes to prefetch, in order.
+        self.__stopped = False
+        self.__condition = threading.Condition()
+        self.__thread = threading.Thread(target=self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def prefetch(self, ui_list_indexes):
+        """ Prefetch the rules of UI list indexes, in order. Returns at once."""
+        with self.__condition:
+            self.__pending = list(ui_list_indexes)
+            self.__condition.notify()
+
+    def stop(self):
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while not self.__pending and not self.__stopped:
+                    self.__condition.wait()
+                if self.__stopped:
+                    return
+                ui_list_index = self.__pending.pop(0)
+
+            self.RecordingRule.prefetch_schedule_rule(ui_list_index)
+
+# Program status code to string.
+# Info here: https://github.com/janbar/pvr.mythtv/blob/doityourself/lib/cppmyth/src/mythtypes.h
+# https://github.com/ascagnel/mythPlex/blob/master/mythPlex.py
+# https://github.com/janbar/pvr.mythtv
+_program_status_strings = {'-10': 'Tuning', '-9': 'Failed', '-8': 'Tuner Busy', '-7': 'Low Diskspace',
+                           '-6': 'Canceled', '-5': 'Missed', '-4': 'Aborted', '-3': 'Recorded', '-2': 'Recording',
+                           '-1': 'Will Record', '0': 'Unknown', '1': 'Dont Record', '2': 'Previous Recording',
+                           '3': 'Current Recording', '4': 'Earlier Recording', '5': 'Too Many Recordings',
+                           '6': 'Not Listed', '7': 'Conflict', '8': 'Later Showing', '9': 'Repeat',
+                           '10': 'Inactive', '11': 'Never Record', '12': 'Offline', '13': 'Other Showing'}
+
+_program_keys = ('program_index', 'RecordId', 'RecType', 'ChanId', 'StartTime', 'EndTime', 'StartDate_str',
+                 'StartTime_str', 'EndTime_str', 'Status', 'Status_str', 'CallSign', 'ProgramId', 'Description')
+_program_display_keys = ('StartDate_str', 'StartTime_str', 'EndTime_str')
+_program_update_keys = ('RecordId', 'RecType', 'EndTime', 'Status', 'CallSign', 'ProgramId', 'Description')
+
+_interned_values = {}               # Shared instances of repeated program strings. E.g. CallSign, RecType.
+
+def _intern(value):
+    """ Returns a shared instance of an equal string. (intern() does not accept unicode)"""
+    return _interned_values.setdefault(value, value)
+
+def _requested_program(program_index, requested_program):
+    """ Returns a Program from a requested program dict."""
+    return Program(program_index, requested_program['RecordId'], requested_program['RecType'],
+                   requested_program['ChanId'], requested_program['StartTime'], requested_program['EndTime'],
+                   requested_program['Status'], requested_program['CallSign'], requested_program['ProgramId'],
+                   requested_program['Description'])
+
+class Program(object):
+    """ A cached program.  Read and edit as a dict, E.g. program['RecordId'].
+    Compact - Fixed slots, shared instances of repeated strings and the description held as utf-8.
+    Local date/time strings are formatted when first read, and again if the UI date/time format is changed."""
+    __slots__ = ('program_index', 'RecordId', 'RecType', 'ChanId', 'StartTime', 'EndTime', 'Status', 'CallSign',
+                 'ProgramId', '__description', '__display_strings')
+
+    def __init__(self, program_index, record_id, rec_type, chan_id, start_time, end_time, status, call_sign,
+                 program_id, description):
+        self.program_index = program_index
+        self.RecordId = _intern(record_id)
+        self.RecType = _intern(rec_type)
+        self.ChanId = _intern(chan_id)
+        self.StartTime = _intern(start_time)
+        self.EndTime = _intern(end_time)
+        self.Status = _intern(status)
+        self.CallSign = _intern(call_sign)
+        self.ProgramId = program_id
+        self.__description = (description or u'').encode('utf-8')
+        self.__display_strings = None       # Format generation and formatted StartDate_str, StartTime_str, EndTime_str.
+
+    def __getitem__(self, key):
+        if key in _program_display_keys:
+            return self.__display_string(key)
+        elif key == 'Status_str':
+            # Decode status code.
+            return _program_status_strings.get(self.Status, 'None')
+        elif key == 'Description':
+            return self.__description.decode('utf-8')
+        elif key in _program_keys:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _program_display_keys or key == 'Status_str' or key not in _program_keys:
+            raise KeyError(key)
+        elif key == 'Description':
+            self.__description = value.encode('utf-8')
+        else:
+            setattr(self, key, _intern(value))
+
+    def differs(self, program):
+        """ Returns True if a newly requested program of the same channel & start time has changed."""
+        for key in _program_update_keys:
+            if self[key] != program[key]:
+                return True
+        return False
+
+    def update(self, program):
+        """ Update from a newly requested program of the same channel & start time. Returns True if changed."""
+        if not self.differs(program):
+            return False
+        for key in _program_update_keys:
+            self[key] = program[key]
+        self.__display_strings = None
+        return True
+
+    def __display_string(self, key):
+        """ Returns a local date/time string, formatted on first read per UI date/time format."""
+        if self.__display_strings is None or self.__display_strings[0] != _display_format_generation:
+            # Convert Myth utc time to local time and in user selected format.
+            self.__display_strings = (_display_format_generation,
+                                      _myth_utc_to_local_time(self.StartTime, _date_format),
+                                      _myth_utc_to_local_time(self.StartTime, _time_format),
+                                      _myth_utc_to_local_time(self.EndTime, _time_format))
+        return self.__display_strings[_program_display_keys.index(key) + 1]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def fields(self):
+        """ Returns the Program() arguments to recreate this program. E.g. from a snapshot."""
+        return [self.program_index, self.RecordId, self.RecType, self.ChanId, self.StartTime, self.EndTime,
+                self.Status, self.CallSign, self.ProgramId, self['Description']]
+
+    def keys(self):
+        return list(_program_keys)
+
+    def __contains__(self, key):
+        return key in _program_keys
+
+    def __iter__(self):
+        return iter(_program_keys)
+
+    def __len__(self):
+        return len(_program_keys)
+
+class ProgramOverrides:
+    """ Index of program overrides (Dont Record) keyed on channel id and start time."""
+    def __init__(self):
+        self.__overrides = {}       # (ChanId, StartTime): List of (parent rule id, override rule id).
+
+    def add(self, chan_id, start_time, parent_rule_id, override_rule_id=''):
+        """ Add a program override."""
+        self.__overrides.setdefault((chan_id, start_time), []).append((parent_rule_id, override_rule_id))
+
+    def get(self, chan_id, start_time):
+        """ Returns the first (parent rule id, override rule id) for a program, or None."""
+        overrides = self.__overrides.get((chan_id, start_time))
+        if overrides:
+            return overrides[0]
+
+    def parent_rule_id(self, chan_id, start_time):
+        """ Returns the parent rule id of a program override, or None."""
+        program_override = self.get(chan_id, start_time)
+        if program_override:
+            return program_override[0]
+
+    def remove(self, chan_id, start_time):
+        """ Remove and return the first (parent rule id, override rule id) for a program, or None."""
+        overrides = self.__overrides.get((chan_id, start_time))
+        if overrides:
+            program_override = overrides.pop(0)
+            if not overrides:
+                del self.__overrides[(chan_id, start_time)]
+            return program_override
+
+    def items(self):
+        """ Returns a list of [chan id, start time, parent rule id, override rule id]. E.g. for a snapshot."""
+        return [[chan_id, start_time, parent_rule_id, override_rule_id]
+                for (chan_id, start_time), overrides in self.__overrides.items()
+                for parent_rule_id, override_rule_id in overrides]
+
+    def __contains__(self, chan_id_start_time):
+        return chan_id_start_time in self.__overrides
+
+    def __len__(self):
+        return len(self.__overrides)
+
 class Programs:
     def __init__(self):
         self.ErrorInfo = ErrorInfo()              # Stores error info for reporting.
@@ -605,16 +1286,25 @@ class Programs:
         self.__load_count = 0                     # Counter for programs loading reporting.
         self.__program_index = 0                  # Index of program in the list of dicts.
         self.__program_per_list_index = []        # Current selected recording rule program list.
+        self.__programs_per_rule_id = {}          # Cached programs grouped per recording rule id.
+        self.__program_per_index = {}             # Cached programs per program index.
+        self.ChangedCount = 0                     # Count of programs changed by the last refresh.
+        self.ToggledCount = 0                     # Count of programs disabled or enabled by toggle_overrides.
 
     def reset(self):
         self.ErrorInfo.reset()
         self.__program_list = []
+        self.__programs_per_rule_id = {}
+        self.__program_per_index = {}
+        _interned_values.clear()
         self.__total_available = 1
         self.__load_count = 0
         self.__program_index = 0
 
-    def cache_programs_list(self):
-        """ Build a list of all programs in RAM for quickly referring to during recording schedule focus."""
+    def cache_programs_list(self, index_programs=True):
+        """ Build a list of all programs in RAM for quickly referring to during recording schedule focus.
+        If loading programs together with recording schedules, set index_programs False and call index_programs()
+        once the schedules (program overrides) are also loaded."""
         # Clear any previous data.
         self.reset()
 
@@ -627,21 +1317,152 @@ class Programs:
 
         if class_http_requested.ErrorInfo.Err:
             self.error(class_http_requested.ErrorInfo)
+        elif index_programs:
+            self.index_programs()
 
         return class_http_requested.ErrorInfo
 
-    def __request_programs(self):
-        """ Query the Myth backend for all programs in chunks."""
+    def refresh_programs_list(self):
+        """ Refresh the programs list after a recording schedule change.  Requested programs are matched to the
+        cached programs by channel id & start time, and the cache is patched in place - Changed programs are updated
+        and regrouped, new programs added and removed programs dropped. Returns ErrorInfo, the cache is kept on error."""
+        # Request all programs, decoded without changing the cache.
+        class_err_info, requested_programs = self.request_programs_list()
+        if class_err_info.Err:
+            return class_err_info
+
+        cached_programs = dict(((program.ChanId, program.StartTime), program) for program in self.__program_list)
+        program_list = []
+        regroup_programs = []                     # Changed and new programs.
+        regroup_all = False                       # Set if kept programs changed order, E.g. same start time.
+        previous_index = -1
+
+        for requested_program in requested_programs:
+            program_index = str(len(program_list))
+            program = cached_programs.pop((requested_program['ChanId'], requested_program['StartTime']), None)
+            if program is None:
+                # New program.
+                program = _requested_program(program_index, requested_program)
+                regroup_programs.append(program)
+            else:
+                if int(program.program_index) < previous_index:
+                    regroup_all = True
+                previous_index = int(program.program_index)
+                if program.differs(requested_program):
+                    # Remove from the groups of the previous recording rule id before the update.
+                    self.__unindex_program(program)
+                    program.update(requested_program)
+                    regroup_programs.append(program)
+                program.program_index = program_index
+            program_list.append(program)
+
+        # Removed programs.
+        for program in cached_programs.values():
+            self.__unindex_program(program)
+
+        # Patch the cache and the changed recording rule id groups.
+        self.__program_list = program_list
+        for program in program_list:
+            self.__program_per_index[program.program_index] = program
+        for program_index in range(len(program_list), self.__program_index):
+            self.__program_per_index.pop(str(program_index), None)
+        self.__program_index = len(program_list)
+
+        if regroup_all:
+            self.index_programs()
+        else:
+            for program in regroup_programs:
+                self.__reindex_program(program)
+
+        self.ChangedCount = len(regroup_programs) + len(cached_programs)
+        return class_err_info
+
+    def request_programs_list(self):
+        """ Request all programs from Myth without changing the cache. Returns ErrorInfo and the programs as dicts,
+        for swap_programs_list. E.g. swapped for programs shown while loading."""
+        self.__load_count = 0
+        requested_programs = []
+        class_http_requested = self.__request_programs(requested_programs)
+        if class_http_requested.ErrorInfo.Err:
+            self.error(class_http_requested.ErrorInfo)
+        return class_http_requested.ErrorInfo, requested_programs
+
+    def swap_programs_list(self, requested_programs, index_programs=True):
+        """ Replace the cached programs with programs of request_programs_list. If loaded together with the
+        recording schedules, list the schedules (program overrides) first or set index_programs False."""
+        self.reset()
+        for requested_program in requested_programs:
+            program = _requested_program(str(self.__program_index), requested_program)
+            self.__program_list.append(program)
+            self.__program_per_index[program['program_index']] = program
+            self.__program_index += 1
+        if index_programs:
+            self.index_programs()
+
+    def snapshot(self):
+        """ Returns the cached programs, to be saved by ScheduleSnapshot."""
+        return [program.fields() for program in self.__program_list]
+
+    def restore_snapshot(self, snapshot):
+        """ Cache the programs of a snapshot, as if requested from Myth. Load the recording rules snapshot first."""
+        self.reset()
+        for program_fields in snapshot:
+            program = Program(*program_fields)
+            self.__program_list.append(program)
+            self.__program_per_index[program['program_index']] = program
+        self.__program_index = len(self.__program_list)
+        self.index_programs()
+
+    def index_programs(self):
+        """ Group the cached programs per recording rule id, for listing programs on recording schedule focus."""
+        self.__programs_per_rule_id = {}
+        for program in self.__program_list:
+            for rule_id in self.__program_rule_ids(program):
+                self.__programs_per_rule_id.setdefault(rule_id, []).append(program)
+
+    def __program_rule_ids(self, program):
+        """ Returns the recording rule ids a program is listed under."""
+        # List programs per recording rule ID, includes MythWeb program status 'Don't record'.
+        rule_ids = [program['RecordId']]
+
+        # Myth PVR Schedules override recordings - Also listed under the parent recording rule.
+        if program['RecType'] == '8':
+            # Look up the overrides (Dont Record) to match Channel id and start time, returns parent rule id.
+            parent_rec_rule_id = _program_overrides.parent_rule_id(program['ChanId'], program['StartTime'])
+            if parent_rec_rule_id is not None and parent_rec_rule_id != program['RecordId']:
+                rule_ids.append(parent_rec_rule_id)
+        return rule_ids
+
+    def __unindex_program(self, program):
+        """ Remove a program from the recording rule id groups, before editing the program or overrides."""
+        for rule_id in self.__program_rule_ids(program):
+            rule_programs = self.__programs_per_rule_id.get(rule_id, [])
+            if program in rule_programs:
+                rule_programs.remove(program)
+
+    def __reindex_program(self, program):
+        """ Add an edited program back to the recording rule id groups, in program list order."""
+        program_index = int(program['program_index'])
+        for rule_id in self.__program_rule_ids(program):
+            rule_programs = self.__programs_per_rule_id.setdefault(rule_id, [])
+            position = len(rule_programs)
+            while position > 0 and int(rule_programs[position - 1]['program_index']) > program_index:
+                position -= 1
+            rule_programs.insert(position, program)
+
+    def __request_programs(self, requested_programs=None):
+        """ Query the Myth backend for all programs in chunks.
+        Programs are added to the cache, or if given, appended to requested_programs as dicts."""
+        if _request_threads > 1:
+            return self.__request_programs_concurrent(requested_programs)
+
         programs_index = 0
         class_http_request = HTTPRequest('')
         global _request_size
 
         while programs_index <= self.__total_available:
             # Set URL String.
-            http_url = _myth_url_prefix + '/Dvr/GetUpcomingList?' \
-                                        + 'StartIndex=' + str(programs_index) \
-                                        + '&Count=' + str(_request_size) \
-                                        + '&ShowAll=true'
+            http_url = self.__programs_url(programs_index)
 
             # Request programs per index & record count, and verify request ok.
             class_http_request = HTTPRequest(http_url)
@@ -652,7 +1473,7 @@ class Programs:
                 return class_http_requested
 
             else:
-                class_err_info = self.__json_to_program_list(class_http_requested.HTML)
+                class_err_info = self.__json_to_program_list(class_http_requested.HTML, requested_programs)
                 if class_err_info.Err:
                     class_http_requested.ErrorInfo.Err = True
                     class_http_requested.ErrorInfo.ErrCodeOrReason = class_err_info.ErrCodeOrReason
@@ -661,11 +1482,49 @@ class Programs:
             programs_index += _request_size
         return class_http_request
 
-    def __json_to_program_list(self, json_reply):
-        """ Build list of dicts - Filter out programs."""
+    def __request_programs_concurrent(self, requested_programs=None):
+        """ Query the Myth backend for all programs in chunks.  The first chunk returns the total available,
+        the remaining chunks are requested concurrently and decoded in index order."""
+        class_http_requested = HTTPRequest(self.__programs_url(0)).http_request()
+
+        if class_http_requested.ErrorInfo.Err:
+            # Notify error.
+            return class_http_requested
+
+        class_err_info = self.__json_to_program_list(class_http_requested.HTML, requested_programs)
+        if class_err_info.Err:
+            class_http_requested.ErrorInfo.Err = True
+            class_http_requested.ErrorInfo.ErrCodeOrReason = class_err_info.ErrCodeOrReason
+            class_http_requested.ErrorInfo.ErrMessage = class_err_info.ErrMessage
+            return class_http_requested
+
+        # Same chunk start indexes as a serial load, so 'program_index' values are identical.
+        http_urls = [self.__programs_url(programs_index)
+                     for programs_index in range(_request_size, self.__total_available + 1, _request_size)]
+
+        for class_http_requested in _http_request_pages(http_urls):
+            if class_http_requested.ErrorInfo.Err:
+                # Notify error.
+                return class_http_requested
+
+            class_err_info = self.__json_to_program_list(class_http_requested.HTML, requested_programs)
+            if class_err_info.Err:
+                class_http_requested.ErrorInfo.Err = True
+                class_http_requested.ErrorInfo.ErrCodeOrReason = class_err_info.ErrCodeOrReason
+                class_http_requested.ErrorInfo.ErrMessage = class_err_info.ErrMessage
+                return class_http_requested
+        return class_http_requested
+
+    def __programs_url(self, programs_index):
+        """ Returns the URL to request a chunk of programs from an index."""
+        return _myth_url_prefix + '/Dvr/GetUpcomingList?' \
+                                + 'StartIndex=' + str(programs_index) \
+                                + '&Count=' + str(_request_size) \
+                                + '&ShowAll=true'
+
+    def __json_to_program_list(self, json_reply, requested_programs=None):
+        """ Build list of programs - Filter out programs. Appended to requested_programs as dicts if given."""
         class_err_info = ErrorInfo()
-        global _date_format
-        global _time_format
 
         try:
             program_list = json.loads(json_reply)
@@ -683,29 +1542,25 @@ class Programs:
                 program_Status = program['Recording']['Status']
                 program_RecType = program['Recording']['RecType']
 
-                # Decode status code.
-                program_Status_str = self.__program_status_string(program_Status)
-
                 # Decode Recording type code.
                 # rec_type_str = self.__program_recording_type_string(prog_RecType)
 
-                # Convert Myth utc time to local time and in user selected format.
-                program_local_StartDate_str = _myth_utc_to_local_time(program_StartTime, _date_format)
-                program_local_StartTime_str = _myth_utc_to_local_time(program_StartTime, _time_format)
-                program_local_EndTime_str = _myth_utc_to_local_time(program_EndTime, _time_format)
-
-                # Build program dictionary.
-                program_dict = {'program_index': str(self.__program_index),
-                                'RecordId': program_RecordId, 'RecType': program_RecType, 'ChanId': program_ChanId,
-                                'StartTime': program_StartTime, 'EndTime': program_EndTime,
-                                'StartDate_str': program_local_StartDate_str,
-                                'StartTime_str': program_local_StartTime_str, 'EndTime_str': program_local_EndTime_str,
-                                'Status': program_Status, 'Status_str': program_Status_str,
-                                'CallSign': program_CallSign, 'ProgramId': program_ProgramId,
-                                'Description': program_Description}
+                if requested_programs is not None:
+                    # Requested for comparison with the cache.
+                    requested_programs.append({'RecordId': program_RecordId, 'RecType': program_RecType,
+                                               'ChanId': program_ChanId, 'StartTime': program_StartTime,
+                                               'EndTime': program_EndTime, 'Status': program_Status,
+                                               'CallSign': program_CallSign, 'ProgramId': program_ProgramId,
+                                               'Description': program_Description})
+                else:
+                    # Build program. - Status and local date/time strings are decoded when first displayed.
+                    program_dict = Program(str(self.__program_index), program_RecordId, program_RecType,
+                                           program_ChanId, program_StartTime, program_EndTime, program_Status,
+                                           program_CallSign, program_ProgramId, program_Description)
 
-                self.__program_list.append(program_dict)
-                self.__program_index += 1
+                    self.__program_list.append(program_dict)
+                    self.__program_per_index[program_dict['program_index']] = program_dict
+                    self.__program_index += 1
 
                 # Report load status.
                 self.__load_count += 1
@@ -726,7 +1581,6 @@ class Programs:
     def get_programs(self, ui_list_index):
         """ Programs. List of Dicts per schedule id."""
         global _list_index_to_rec_rule_id
-        global _program_overrides
         self.__program_per_list_index = []
         list_index = 0
         found_program = False
@@ -734,42 +1588,16 @@ class Programs:
         # Get mapping of list index to recording rule id.
         schedule_id = _list_index_to_rec_rule_id[str(ui_list_index)]
 
-        programs = (element for element in self.__program_list)
-
-        for program in programs:
-            # List programs per recording rule ID, includes MythWeb program status 'Don't record'.
-            if program["RecordId"] == schedule_id:
-                found_program = True
-
-                # Store for quick lookup of program description, series info etc.
-                self.__program_per_list_index.append(program)
-
-                # Provide program info dict to UI.
-                self.programs_list(program, list_index)
-                list_index += 1
-
-            # Myth PVR Schedules override recordings.
-            elif program["RecType"] == '8':
-                # Search the list of overrides (Dont Record) to match Channel id and start time.
-                program_ChanId = program['ChanId']
-                program_StartTime = program['StartTime']
-                query = program_ChanId + ']' + program_StartTime
-
-                if query in _program_overrides:
-                    # Matched a program override with recording rule based on Channel ID + Start time.
-                    idx = _program_overrides.index(query)
-                    parent_rec_rule_id = _program_overrides[idx + 1]         # Parent rule id
-
-                    # If this override parent id matches the currently selected recording schedule - Add to list.
-                    if parent_rec_rule_id == schedule_id:
-                        found_program = True
+        # Programs per recording rule ID, includes override programs per parent rule id.
+        for program in self.__programs_per_rule_id.get(schedule_id, []):
+            found_program = True
 
-                        # Store for quick lookup of program description, series info etc.
-                        self.__program_per_list_index.append(program)
+            # Store for quick lookup of program description, series info etc.
+            self.__program_per_list_index.append(program)
 
-                        # Provide program info dict to UI.
-                        self.programs_list(program, list_index)
-                        list_index += 1
+            # Provide program info dict to UI.
+            self.programs_list(program, list_index)
+            list_index += 1
 
         if not found_program:
             self.programs_list({}, 0)
@@ -782,135 +1610,228 @@ class Programs:
 
     def toggle_override(self, ui_list_index):
         """ Disable or enable a program recording."""
+        # Clear any http error data.
+        self.ErrorInfo.reset()
         class_http_requested = HTTPRequest('')
 
         list_index_int = int(ui_list_index)
         program_and_list_index = self.__program_per_list_index[list_index_int]["program_index"]
 
         #  Get the referenced program from the cashed list item and edit to create/delete override 'Don't Record'.
-        programs = (program for program in self.__program_list
-                    if program["program_index"] == program_and_list_index)
-
-        for program in programs:
-            program_RecType = program['RecType']
-            program_ChanId = program['ChanId']
-            program_StartTime = program['StartTime']
-            program_RecordId = program['RecordId']
-
-            # If not already an override (Don't Record), create one.
-            if program_RecType != '8':
-                # Get an override rule template for this program.
-                # A recording override template is requested using channel id & start time.
-                # The recording rule is set to type 'Don't record' and HTTP Posted back.
-                # A new recording rule is created with type 'Override Recording' and a parent id.
-                # A corresponding program will be set with RecType 8 - 'Don't record'
+        program = self.__program_per_index.get(program_and_list_index)
+
+        if program is not None:
+            class_http_requested = self.__request_toggle_override(program)
+            if class_http_requested.ErrorInfo.Err:
+                self.error(class_http_requested.ErrorInfo)
+            else:
+                self.__unindex_program(program)
+                self.__apply_toggle_override(program, class_http_requested)
+                self.__reindex_program(program)
+
+        return class_http_requested.ErrorInfo
+
+    def toggle_overrides(self, ui_list_indexes):
+        """ Disable or enable many program recordings. The overrides are added and removed concurrently, then the
+        cached programs are grouped once. Every program updated ok is kept, the first ErrorInfo in error is reported
+        and returned."""
+        # Clear any http error data.
+        self.ErrorInfo.reset()
+        class_err_info = ErrorInfo()
+        self.ToggledCount = 0
+
+        # Get the referenced programs from the cashed list items, once each.
+        programs = []
+        for ui_list_index in ui_list_indexes:
+            program_and_list_index = self.__program_per_list_index[int(ui_list_index)]["program_index"]
+            program = self.__program_per_index.get(program_and_list_index)
+            if program is not None and program not in programs:
+                programs.append(program)
+
+        # Request the overrides, 'Concurrent requests' at a time.
+        requests_and_programs = zip(_map_concurrent(self.__try_request_toggle_override, programs), programs)
+
+        # Reflect the changes in the cached programs and override index, then regroup the programs.
+        for class_http_requested, program in requests_and_programs:
+            if class_http_requested.ErrorInfo.Err:
+                if not class_err_info.Err:
+                    class_err_info = class_http_requested.ErrorInfo
+            else:
+                self.__apply_toggle_override(program, class_http_requested)
+                self.ToggledCount += 1
+                if not class_err_info.Err:
+                    class_err_info = class_http_requested.ErrorInfo
+        if self.ToggledCount:
+            self.index_programs()
+
+        if class_err_info.Err:
+            self.error(class_err_info)
+        return class_err_info
+
+    def __try_request_toggle_override(self, program):
+        """ See __request_toggle_override, an exception is returned as an HTTPRequest in error so the overrides
+        requested by the other worker threads are still applied."""
+        try:
+            return self.__request_toggle_override(program)
+        except Exception, err:
+            class_http_requested = HTTPRequest('')
+            class_http_requested.ErrorInfo.Err = True
+            class_http_requested.ErrorInfo.ErrCodeOrReason = type(err).__name__
+            class_http_requested.ErrorInfo.ErrMessage = str(err)
+            return class_http_requested
+
+    def __request_toggle_override(self, program):
+        """ Http request the Myth backend to create or delete the override (Don't Record) for a program.
+        Returns the HTTPRequest, for __apply_toggle_override if not in error. Errors are left to the caller to
+        report, as this may be called from a worker thread."""
+        class_http_requested = HTTPRequest('')
+        program_RecType = program['RecType']
+        program_ChanId = program['ChanId']
+        program_StartTime = program['StartTime']
+        program_RecordId = program['RecordId']
+
+        # If not already an override (Don't Record), create one.
+        if program_RecType != '8':
+            # Get an override rule template for this program.
+            # Built from the cached parent recording rule if loaded, else a recording override template is
+            # requested using channel id & start time.
+            # The recording rule is set to type 'Don't record' and HTTP Posted back.
+            # A new recording rule is created with type 'Override Recording' and a parent id.
+            # A corresponding program will be set with RecType 8 - 'Don't record'
+            template_dict = self.__override_template_from_parent(program)
+
+            if template_dict is None:
                 class_http_requested = self.__request__override_template(program_ChanId, program_StartTime)
 
-                if class_http_requested.ErrorInfo.Err:
-                    return class_http_requested.ErrorInfo
-                else:
-                    rec_rule_dict = json.loads(class_http_requested.HTML)
-                    template_dict = rec_rule_dict['RecRule']
-
-                    # Translate for update.
-                    # template_dict['RecordId'] = template_dict.pop('Id')
-                    template_dict['Station'] = template_dict.pop('CallSign')
-
-                    # Set Don't record.
-                    template_dict['Type'] = 'Dont Record'
-                    template_dict['SearchType'] = 'None'
-                    template_dict['SubTitle'] = program_StartTime
-
-                    # Http post the rule to Myth back end.
-                    # If updated ok, reflect the change in the listed program.
-                    class_http_requested = self.__request_override(template_dict)
-                    if class_http_requested.ErrorInfo.Err:
-                        return class_http_requested.ErrorInfo
-                    else:
-                        # Return html reply via ErrorInfo.ErrMessage for logging the new recording rule for log.
-                        class_http_requested.ErrorInfo.ErrMessage = class_http_requested.HTML
-
-                    # Report if Myth server did not respond ok with 'uint'  E.g.: {"uint": "252"}'
-                    if 'uint' not in class_http_requested.HTML:
+            if class_http_requested.ErrorInfo.Err:
+                return class_http_requested
+            else:
+                if template_dict is None:
+                    try:
+                        rec_rule_dict = json.loads(class_http_requested.HTML)
+                        template_dict = rec_rule_dict['RecRule']
+
+                        # Translate for update.
+                        # template_dict['RecordId'] = template_dict.pop('Id')
+                        template_dict['Station'] = template_dict.pop('CallSign')
+
+                    except ValueError:
                         class_http_requested.ErrorInfo.Err = True
-                        class_http_requested.ErrorInfo.ErrCodeOrReason = ''
-                        class_http_requested.ErrorInfo.ErrMessage = 'Myth server - Add override: ' \
-                                                                    + str(class_http_requested.HTML)
-                        self.error(class_http_requested.ErrorInfo)
-                        return class_http_requested.ErrorInfo
-                    else:
-                        # Update the global override list '_program_overrides' (Normally generated from schedule list)
-                        global _program_overrides
-                        _program_overrides.append(program_ChanId + ']' + program_StartTime)
-                        _program_overrides.append(program_RecordId)
-
-                        # Update program cache list 'self.__program_list'
-                        decoded_json = json.loads(class_http_requested.HTML)
-                        override_rec_rule_id = decoded_json['uint']
-                        program['RecordId'] = override_rec_rule_id
-                        program['RecType'] = '8'
-                        program['Status'] = '1'
-                        program['Status_str'] = 'Dont Record'
-
-            elif program_RecType == '8':
-                    # Delete the override recording rule.
-                    # Clear any http error data.
-                    self.ErrorInfo.reset()
-
-                    # Request recording rule deletion.
-                    schedule_id_dict = {'RecordId': str(program_RecordId)}
-                    class_http_requested = self.__remove_recording_rule(schedule_id_dict)
-
-                    # Report http post error.
-                    if class_http_requested.ErrorInfo.Err:
-                        self.error(class_http_requested.ErrorInfo)
-                        return class_http_requested.ErrorInfo
-
-                    # Report if Myth server did not respond ok with '{"bool": "true"}'
-                    if 'true' not in class_http_requested.HTML:
+                        class_http_requested.ErrorInfo.ErrCodeOrReason = 'ValueError'
+                        class_http_requested.ErrorInfo.ErrMessage = 'Value Error'
+                        return class_http_requested
+
+                    except KeyError:
                         class_http_requested.ErrorInfo.Err = True
-                        class_http_requested.ErrorInfo.ErrCodeOrReason = ''
-                        class_http_requested.ErrorInfo.ErrMessage = 'Myth server - Remove schedule: ' \
-                                                                    + str(class_http_requested.HTML)
-                        self.error(class_http_requested.ErrorInfo)
-                        return class_http_requested.ErrorInfo
-                    else:
-                        # Update the global override list '_program_overrides' (Normally generated from schedule list)
-                        global _program_overrides
-                        # Search the list of overrides (Dont Record) to match Channel id and start time.
-                        program_ChanId = program['ChanId']
-                        program_StartTime = program['StartTime']
-                        query = program_ChanId + ']' + program_StartTime
-
-                        if query in _program_overrides:
-                            # Matched a program override with recording rule based on Channel ID + Start time.
-                            idx = _program_overrides.index(query)
-
-                            # Update program cache list 'self.__program_list'
-                            program['RecordId'] = _program_overrides.pop(idx + 1)
-                            program['RecType'] = '4'
-                            program['Status'] = '-1'
-                            program['Status_str'] = 'Will Record'
-
-                            # Remove from override list.
-                            _program_overrides.pop(idx)
+                        class_http_requested.ErrorInfo.ErrCodeOrReason = 'KeyError'
+                        class_http_requested.ErrorInfo.ErrMessage = 'Key Error'
+                        return class_http_requested
 
-        return class_http_requested.ErrorInfo
+                # Set Don't record.
+                template_dict['Type'] = 'Dont Record'
+                template_dict['SearchType'] = 'None'
+                template_dict['SubTitle'] = program_StartTime
+
+                # Http post the rule to Myth back end.
+                class_http_requested = self.__request_override(template_dict)
+                if class_http_requested.ErrorInfo.Err:
+                    return class_http_requested
+                else:
+                    # Return html reply via ErrorInfo.ErrMessage for logging the new recording rule for log.
+                    class_http_requested.ErrorInfo.ErrMessage = class_http_requested.HTML
+
+                # Report if Myth server did not respond ok with 'uint'  E.g.: {"uint": "252"}'
+                if 'uint' not in class_http_requested.HTML:
+                    class_http_requested.ErrorInfo.Err = True
+                    class_http_requested.ErrorInfo.ErrCodeOrReason = ''
+                    class_http_requested.ErrorInfo.ErrMessage = 'Myth server - Add override: ' \
+                                                                + str(class_http_requested.HTML)
+
+        elif program_RecType == '8':
+                # Delete the override recording rule.
+                # Request recording rule deletion.
+                schedule_id_dict = {'RecordId': str(program_RecordId)}
+                class_http_requested = self.__remove_recording_rule(schedule_id_dict)
+
+                # Return http post error.
+                if class_http_requested.ErrorInfo.Err:
+                    return class_http_requested
+
+                # Report if Myth server did not respond ok with '{"bool": "true"}'
+                if 'true' not in class_http_requested.HTML:
+                    class_http_requested.ErrorInfo.Err = True
+                    class_http_requested.ErrorInfo.ErrCodeOrReason = ''
+                    class_http_requested.ErrorInfo.ErrMessage = 'Myth server - Remove schedule: ' \
+                                                                + str(class_http_requested.HTML)
+
+        return class_http_requested
+
+    def __apply_toggle_override(self, program, class_http_requested):
+        """ Reflect a created or deleted override in the listed program and the override index.
+        Regrouping the program per recording rule id is left to the caller."""
+        program_ChanId = program['ChanId']
+        program_StartTime = program['StartTime']
+
+        if program['RecType'] != '8':
+            decoded_json = json.loads(class_http_requested.HTML)
+            override_rec_rule_id = decoded_json['uint']
+
+            # Update the global override index '_program_overrides' (Normally generated from schedule list)
+            _program_overrides.add(program_ChanId, program_StartTime, program['RecordId'], override_rec_rule_id)
+
+            # Update program cache list 'self.__program_list'
+            program['RecordId'] = override_rec_rule_id
+            program['RecType'] = '8'
+            program['Status'] = '1'                     # 'Dont Record'
+        else:
+            # Remove from the global override index '_program_overrides' to match Channel id and start
+            # time. (Normally generated from schedule list)
+            program_override = _program_overrides.remove(program_ChanId, program_StartTime)
+
+            if program_override:
+                # Update program cache list 'self.__program_list' - Restore the parent rule id.
+                program['RecordId'] = program_override[0]
+                program['RecType'] = '4'
+                program['Status'] = '-1'                # 'Will Record'
+
+    def __override_template_from_parent(self, program):
+        """ Returns an override rule template for a program, as made by the backend for MakeOverride, from the cached
+        parent recording rule. Returns None if the parent rule is not cached or is a search rule, as the backend copies
+        the program title etc. to the override of a search rule."""
+        template_dict = _rule_detail_cache.get(program['RecordId'])
+        if template_dict is None or template_dict.get('SearchType') != 'None':
+            return None
+
+        # Remove decoded filters and superfluous information, the encoded 'Filter' is kept.
+        for key in template_dict.keys():
+            if key.startswith('Filter') and key != 'Filter':
+                del template_dict[key]
+        for key in ('NextRecording', 'LastRecorded', 'LastDeleted', 'AverageDelay'):
+            template_dict.pop(key, None)
+
+        # An override of the parent rule, for this showing.
+        template_dict['Id'] = '0'
+        template_dict['ParentId'] = program['RecordId']
+        template_dict['ChanId'] = program['ChanId']
+        template_dict['StartTime'] = program['StartTime']
+        template_dict['EndTime'] = program['EndTime']
+        template_dict['ProgramId'] = program['ProgramId']
+        template_dict['Description'] = program['Description']
+        template_dict['Inactive'] = 'false'                 # An override of an inactive rule is active.
+        template_dict.pop('CallSign', None)
+        template_dict['Station'] = program['CallSign']
+        return template_dict
 
     def __request__override_template(self, rec_channel_id, rec_start_time):
         """ Http request the Myth backend for a recording schedule."""
-        self.ErrorInfo.reset()
         # Set URL String.
         http_url = _myth_url_prefix + '/Dvr/GetRecordSchedule?' \
                                     + 'ChanId=' + rec_channel_id \
                                     + '&StartTime=' + rec_start_time \
                                     + '&MakeOverride=true'
-        # Request override rule and verify http get ok.
+        # Request override rule.
         class_http_request = HTTPRequest(http_url)
         class_http_requested = class_http_request.http_request()
-
-        if class_http_requested.ErrorInfo.Err:
-            self.error(class_http_requested.ErrorInfo)
         return class_http_requested
 
     def __request_override(self, recording_rule_dict):
@@ -940,64 +1861,6 @@ class Programs:
         """ Error info. - Override me."""
         pass
 
-    def __program_status_string(self, str_code):
-        """ Program status code to string."""
-        # Info here: https://github.com/janbar/pvr.mythtv/blob/doityourself/lib/cppmyth/src/mythtypes.h
-        # https://github.com/ascagnel/mythPlex/blob/master/mythPlex.py
-        # https://github.com/janbar/pvr.mythtv
-        if str_code == '-10':
-            return 'Tuning'
-        elif str_code == '-9':
-            return 'Failed'
-        elif str_code == '-8':
-            return 'Tuner Busy'
-        elif str_code == '-7':
-            return 'Low Diskspace'
-        elif str_code == '-6':
-            return 'Canceled'
-        elif str_code == '-5':
-            return 'Missed'
-        elif str_code == '-4':
-            return 'Aborted'
-        elif str_code == '-3':
-            return 'Recorded'
-        elif str_code == '-2':
-            return 'Recording'
-        elif str_code == '-1':
-            return 'Will Record'
-        elif str_code == '0':
-            return 'Unknown'
-        elif str_code == '1':
-            return 'Dont Record'
-        elif str_code == '2':
-            return 'Previous Recording'
-        elif str_code == '3':
-            return 'Current Recording'
-        elif str_code == '3':
-            return 'Current Recording'
-        elif str_code == '4':
-            return 'Earlier Recording'
-        elif str_code == '5':
-            return 'Too Many Recordings'
-        elif str_code == '6':
-            return 'Not Listed'
-        elif str_code == '7':
-            return 'Conflict'
-        elif str_code == '8':
-            return 'Later Showing'
-        elif str_code == '9':
-            return 'Repeat'
-        elif str_code == '10':
-            return 'Inactive'
-        elif str_code == '11':
-            return 'Never Record'
-        elif str_code == '12':
-            return 'Offline'
-        elif str_code == '13':
-            return 'Other Showing'
-        else:
-            return 'None'
-
     def __program_recording_type_string(self, str_code):
         """ Program recording type code to string."""
         if str_code == '0':
@@ -1027,30 +1890,151 @@ class Programs:
         else:
             return 'None'
 
+# http://strftime.org/
+class ScheduleSnapshot:
+    """ The last loaded recording rules and programs, saved to a file to show at once on the next start while
+    they are requested again. A snapshot is only loaded for the same key. E.g. Myth host and protocol version."""
+    Version = 1
+
+    def __init__(self, file_path, key):
+        self.file_path = file_path
+        self.key = [self.Version] + list(key)
+        self.Generation = 0         # Incremented by invalidate().
+
+    def load(self):
+        """ Returns (recording rules snapshot, programs snapshot), or None if no valid snapshot."""
+        try:
+            with open(self.file_path, 'rb') as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            if snapshot['Key'] != self.key:
+                return None
+            return snapshot['RecordingRules'], snapshot['Programs']
+
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, recording_rules, programs, generation=None):
+        """ Save the snapshots of RecordingRule and Programs. Pass the Generation noted before loading them to not
+        save if invalidated while loading. Returns False if not saved."""
+        if generation is not None and generation != self.Generation:
+            return False
+
+        temp_file_path = self.file_path + '.tmp'
+        try:
+            with open(temp_file_path, 'wb') as snapshot_file:
+                json.dump({'Key': self.key, 'RecordingRules': recording_rules.snapshot(),
+                           'Programs': programs.snapshot()}, snapshot_file, separators=(',', ':'))
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)       # Windows will not rename over an existing file.
+            os.rename(temp_file_path, self.file_path)
+            return True
+
+        except (IOError, OSError):
+            return False
+
+    def invalidate(self):
+        """ Remove the snapshot. E.g. when schedules change."""
+        self.Generation += 1
+        try:
+            os.remove(self.file_path)
+        except OSError:
+            pass
+
+
+_local_time_formats = {'Day': '%A',                     # Tuesday
+                       '12Hr': '%I:%M%p',               # 06:45PM
+                       '24Hr': '%H:%M',                 # 18:45
+                       'DD-MM-YYYY': '%d-%m-%Y',        # 26-05-2015
+                       'YYYY-MM-DD': '%Y-%m-%d',        # 2015-05-26
+                       'MM-DD-YYYY': '%m-%d-%Y'}        # 05-26-2015
+_time_of_day_formats = ('12Hr', '24Hr')                 # Formats cached per time of day, others per calendar day.
+_epoch_ordinal = date(1970, 1, 1).toordinal()
+
+class LocalTimeConverter:
+    """ Myth UTC time to local date/time strings.  UTC offsets are cached per day (per quarter hour on a daylight
+    saving change day) and formatted strings per calendar day or time of day."""
+    def __init__(self):
+        self.__utc_offset_per_day = {}              # UTC offset seconds per UTC day, False if a DST change day.
+        self.__utc_offset_per_quarter_hour = {}     # UTC offset seconds per UTC quarter hour on DST change days.
+        self.__local_epoch_per_utc = {}             # Local time seconds per Myth UTC time string.
+        self.__formatted = {}                       # Formatted strings per (local day or minute of day, format).
+
+    def utc_epoch(self, myth_utc):
+        """ Returns seconds since epoch of a Myth UTC time string. E.g. 2015-04-13T08:30:00Z"""
+        return (date(int(myth_utc[0:4]), int(myth_utc[5:7]), int(myth_utc[8:10])).toordinal() - _epoch_ordinal) \
+            * 86400 + int(myth_utc[11:13]) * 3600 + int(myth_utc[14:16]) * 60 + int(myth_utc[17:19])
+
+    def local_epoch(self, myth_utc):
+        """ Returns local time as seconds since epoch of a Myth UTC time string."""
+        local_epoch = self.__local_epoch_per_utc.get(myth_utc)
+        if local_epoch is None:
+            utc_epoch = self.utc_epoch(myth_utc)
+            local_epoch = utc_epoch + self.utc_offset(utc_epoch)
+            if len(self.__local_epoch_per_utc) > 20000:
+                self.__local_epoch_per_utc.clear()
+            self.__local_epoch_per_utc[myth_utc] = local_epoch
+        return local_epoch
+
+    def utc_offset(self, utc_epoch):
+        """ Returns the local UTC offset seconds at a UTC time."""
+        day = utc_epoch // 86400
+        utc_offset = self.__utc_offset_per_day.get(day)
+        if utc_offset is None:
+            # The same offset at the start and end of a day is used for the whole day.
+            utc_offset = self.__local_utc_offset(day * 86400)
+            if utc_offset != self.__local_utc_offset(day * 86400 + 86399):
+                utc_offset = False
+            self.__utc_offset_per_day[day] = utc_offset
+
+        if utc_offset is False:
+            # Daylight saving change day - DST changes are on a quarter hour.
+            quarter_hour = utc_epoch // 900
+            utc_offset = self.__utc_offset_per_quarter_hour.get(quarter_hour)
+            if utc_offset is None:
+                utc_offset = self.__local_utc_offset(quarter_hour * 900)
+                self.__utc_offset_per_quarter_hour[quarter_hour] = utc_offset
+        return utc_offset
+
+    def __local_utc_offset(self, utc_epoch):
+        """ Returns the local UTC offset seconds at a UTC time, from the OS time zone."""
+        return calendar.timegm(time.localtime(utc_epoch)) - utc_epoch
+
+    def format(self, myth_utc, time_date_format):
+        """ Returns a Myth UTC time string as a local date/time string in a UI date/time format."""
+        if time_date_format == '?':
+            return time.strftime("%Z", time.localtime(self.utc_epoch(myth_utc)))   # AUS Eastern Daylight Time
+
+        local_time_format = _local_time_formats.get(time_date_format)
+        if local_time_format is None:
+            return None
+
+        local_epoch = self.local_epoch(myth_utc)
+        if time_date_format in _time_of_day_formats:
+            format_key = (local_epoch % 86400 // 60, time_date_format)
+        else:
+            format_key = (local_epoch // 86400, time_date_format)
+
+        formatted = self.__formatted.get(format_key)
+        if formatted is None:
+            formatted = time.strftime(local_time_format, time.gmtime(local_epoch))
+            self.__formatted[format_key] = formatted
+        return formatted
+
+_local_time_converter = LocalTimeConverter()
+
 def _myth_utc_to_local_time(myth_utc, time_date_format='?'):
     """ Returns a list of local date/time formats."""
-    str_time = time.strptime(myth_utc, "%Y-%m-%dT%H:%M:%SZ")
-    epoch = time.mktime(str_time)
-    utc = datetime.fromtimestamp(epoch)
-    offset = datetime.fromtimestamp(epoch) - datetime.utcfromtimestamp(epoch)
-    local_time = str(utc + offset)  # 2015-04-13 18:30:00
-    local_time_24hr = time.strptime(local_time, "%Y-%m-%d %H:%M:%S")
-
-    # http://strftime.org/
-    if time_date_format == '?':
-        return time.strftime("%Z", local_time_24hr)             # AUS Eastern Daylight Time
-    if time_date_format == 'Day':
-        return time.strftime("%A", local_time_24hr)             # Tuesday
-    elif time_date_format == '12Hr':
-        return time.strftime("%I:%M%p", local_time_24hr)        # 06:45PM
-    elif time_date_format == '24Hr':
-        return time.strftime("%H:%M", local_time_24hr)          # 18:45
-    elif time_date_format == 'DD-MM-YYYY':
-        return time.strftime("%d-%m-%Y", local_time_24hr)       # 26-05-2015
-    elif time_date_format == 'YYYY-MM-DD':
-        return time.strftime("%Y-%m-%d", local_time_24hr)       # 2015-05-26
-    elif time_date_format == 'MM-DD-YYYY':
-        return time.strftime("%m-%d-%Y", local_time_24hr)       # 05-26-2015
+    return _local_time_converter.format(myth_utc, time_date_format)
+
+def _rule_value(value):
+    """ Returns a recording rule value for comparison. UI edits set True/False where Myth returns 'true'/'false'."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, basestring):
+        value = value.strip()
+        if value.lower() in ('true', 'false'):
+            return value.lower()
+    return value
 
 def string_to_bool(true_or_false):
     """ Convert Myth http bool string to bool."""